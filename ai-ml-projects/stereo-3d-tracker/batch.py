@@ -0,0 +1,179 @@
+"""
+여러 스테레오 클립 쌍을 화면 표시 없이 일괄 처리하는 헤드리스 실행기
+
+매니페스트 (CSV 또는 JSON) 항목:
+    left, right       좌/우 비디오 경로 (매니페스트 파일 기준 상대 경로 허용)
+    x, y              추적 시작 좌표 (생략하면 feature_matching.find_initial_candidates로 --auto-targets개 자동 선택)
+    points            여러 대상 추적 시 시작 좌표 목록 (JSON: [[x, y], ...], CSV: "x1 y1; x2 y2")
+    name              출력 폴더 이름 (생략하면 왼쪽 비디오 파일 이름)
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+from calibration import create_rectifier
+from disparity import DisparityEngine, BACKENDS
+from feature_matching import find_initial_candidates
+from frame_source import StereoFrameSource
+from frame_writer import IMAGE_FORMATS
+from main import load_videos, track_objects
+from reacquire import TargetReacquirer
+from recorder import TrackingRecorder
+from sync import synchronize_videos
+from telemetry import PipelineTelemetry
+from tracking import TRACKER_BACKENDS, initialize_trackers
+from utils import ensure_output_folder
+
+
+def load_manifest(path):
+    """매니페스트 파일에서 클립 작업 목록을 읽음"""
+    with open(path, newline='') as file:
+        if path.endswith('.json'):
+            entries = json.load(file)
+        else:
+            entries = list(csv.DictReader(file))
+
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    for entry in entries:
+        left = os.path.join(base, entry['left'])
+        right = os.path.join(base, entry['right'])
+        points = None
+        if entry.get('points'):
+            points = entry['points']
+            if isinstance(points, str):
+                points = [item.split() for item in points.split(';') if item.strip()]
+            points = [(float(x), float(y)) for x, y in points]
+        elif entry.get('x') not in (None, '') and entry.get('y') not in (None, ''):
+            points = [(float(entry['x']), float(entry['y']))]
+        name = entry.get('name') or os.path.splitext(os.path.basename(left))[0]
+        jobs.append({'name': name, 'left': left, 'right': right, 'points': points})
+    return jobs
+
+
+def process_clip(job, output_root, options):
+    """클립 한 쌍을 추적하고 요약 정보를 반환함 (워커 프로세스에서 실행)"""
+    cv2.setNumThreads(options['opencv_threads'])
+    start = time.perf_counter()
+    summary = {'name': job['name'], 'frames': 0, 'seconds': 0.0, 'error': None}
+
+    cap_left, cap_right = load_videos(job['left'], job['right'])
+    if not cap_left or not cap_right:
+        summary['error'] = 'could not open videos'
+        return summary
+
+    # 중간에 실패해 반환해도 캡처를 해제함 (정상 종료 시 StereoFrameSource가 이미 해제했어도 다시 해제해도 무해함)
+    try:
+        synced, _, lag = synchronize_videos(cap_left, cap_right)
+        if synced is None:
+            summary['error'] = 'could not read frames for synchronization'
+            return summary
+
+        ret_left, left_img = cap_left.read()
+        ret_right, right_img = cap_right.read()
+        if not ret_left or not ret_right:
+            summary['error'] = 'could not read initial frames'
+            return summary
+
+        rectifier = None
+        if options['calibration']:
+            rectifier = create_rectifier(options['calibration'], left_img, right_img)
+            left_img, right_img = rectifier.rectify(left_img, right_img)
+
+        points = job['points']
+        if points is None:
+            points_left, _, _ = find_initial_candidates(left_img, right_img, k=options['auto_targets'])
+            if len(points_left) == 0:
+                summary['error'] = 'no feature matches for automatic initialization'
+                return summary
+            points = [tuple(point) for point in points_left]
+
+        output_folder = os.path.join(output_root, job['name'])
+        ensure_output_folder(output_folder)
+        trackers = initialize_trackers(left_img, points, options['tracker'])
+        reacquirers = [TargetReacquirer(left_img, point) for point in points] if options['reacquire'] else None
+        engine = DisparityEngine(options['disparity_backend'], options['num_disparities'], options['block_size'])
+        source = StereoFrameSource(cap_left, cap_right)
+        recorder = TrackingRecorder(output_folder, image_format=options['image_format'],
+                                    fps=cap_left.get(cv2.CAP_PROP_FPS) or 30.0)
+        telemetry = PipelineTelemetry()
+        try:
+            track = track_objects(source, trackers, points, engine, recorder=recorder,
+                                  roi_disparity=options['roi_disparity'], reacquirers=reacquirers,
+                                  tracker_backend=options['tracker'], telemetry=telemetry, verbose=False,
+                                  rectifier=rectifier)
+        finally:
+            recorder.close()
+            telemetry.save(os.path.join(output_folder, 'telemetry.npz'))
+
+        summary['frames'] = len(np.unique(track['frame_idx']))
+        summary['seconds'] = time.perf_counter() - start
+        summary['lag'] = lag
+        return summary
+    finally:
+        cap_left.release()
+        cap_right.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='스테레오 추적 헤드리스 일괄 처리')
+    parser.add_argument('manifest', help='클립 쌍 매니페스트 (CSV 또는 JSON)')
+    parser.add_argument('--output', '-o', default='output/batch', help='클립별 출력 폴더의 상위 경로')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count(), help='동시에 처리할 클립 수')
+    parser.add_argument('--opencv-threads', type=int, default=1,
+                        help='워커당 OpenCV 스레드 수 (기본값: 1, 과도한 스레드 경쟁 방지)')
+    parser.add_argument('--disparity-backend', choices=BACKENDS, default='bm')
+    parser.add_argument('--num-disparities', type=int, default=64)
+    parser.add_argument('--block-size', type=int, default=15)
+    parser.add_argument('--tracker', choices=TRACKER_BACKENDS, default='csrt')
+    parser.add_argument('--auto-targets', type=int, default=1,
+                        help='매니페스트에 시작 좌표가 없을 때 자동으로 고를 대상 수 (서로 떨어진 상위 매칭, 기본값: 1)')
+    parser.add_argument('--calibration', help='모든 클립에 적용할 스테레오 캘리브레이션 파일 (npz 또는 yml/xml)')
+    parser.add_argument('--roi-disparity', action='store_true')
+    parser.add_argument('--no-reacquire', action='store_true')
+    parser.add_argument('--image-format', choices=IMAGE_FORMATS, default='none',
+                        help='프레임 이미지 저장 방식 (기본값: none)')
+    args = parser.parse_args()
+
+    jobs = load_manifest(args.manifest)
+    options = {
+        'opencv_threads': args.opencv_threads,
+        'disparity_backend': args.disparity_backend,
+        'num_disparities': args.num_disparities,
+        'block_size': args.block_size,
+        'roi_disparity': args.roi_disparity,
+        'image_format': args.image_format,
+        'reacquire': not args.no_reacquire,
+        'tracker': args.tracker,
+        'calibration': args.calibration,
+        'auto_targets': args.auto_targets,
+    }
+    print(f"Processing {len(jobs)} clip pairs with {args.workers} workers.")
+
+    start = time.perf_counter()
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(process_clip, job, args.output, options): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                summary = future.result()
+            except Exception as exc:
+                summary = {'name': job['name'], 'error': repr(exc)}
+            if summary.get('error'):
+                failed += 1
+                print(f"[{summary['name']}] failed: {summary['error']}")
+            else:
+                print(f"[{summary['name']}] {summary['frames']} frames tracked in {summary['seconds']:.1f}s "
+                      f"(lag {summary['lag']:.2f} frames)")
+
+    print(f"Done: {len(jobs) - failed}/{len(jobs)} clips in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
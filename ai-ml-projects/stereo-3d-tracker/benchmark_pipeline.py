@@ -0,0 +1,158 @@
+"""
+합성 스테레오 비디오로 추적 파이프라인 전체의 처리량과 정확도를 측정하는 벤치마크
+
+해상도마다 정답 disparity와 대상 궤적을 알고 있는 합성 클립(synthetic.py)을 만들어
+track_objects를 화면 표시 없이 실행하고 다음을 보고함
+    FPS, 단계별 평균 지연 시간(telemetry, decode는 합성 프레임 생성 시간),
+    최대 RSS, 추적 위치 오차, 추적 실패율, 정답 대비 깊이 오차
+깊이 오차는 추적 위치가 정답에서 허용 오차 이내인 프레임에서만 계산함
+(대상을 놓친 프레임의 깊이는 배경을 재는 것이므로 깊이 정확도와 무관함)
+해상도마다 별도 프로세스에서 실행하므로 최대 메모리가 서로 섞이지 않음
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from disparity import DisparityEngine, IncrementalDisparity, BACKENDS
+from main import track_objects
+from parallel_disparity import SharedDisparityPool
+from synthetic import SyntheticStereoSource
+from telemetry import PipelineTelemetry, STAGES
+from tracking import TRACKER_BACKENDS, initialize_trackers, disparity_to_depth
+
+DEFAULT_RESOLUTIONS = ('640x360', '1280x720', '1920x1080')
+
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def run_resolution(width, height, options):
+    """한 해상도에서 파이프라인을 실행하고 측정 결과를 반환함 (별도 프로세스에서 실행)"""
+    source = SyntheticStereoSource(width, height, options['frames'] + 1, start=1)
+    left, _, _ = source.render(0)
+    point = tuple(int(v) for v in np.round(source.trajectory(0)))
+
+    # 대상 disparity를 덮는 가장 작은 16의 배수 탐색 범위
+    num_disparities = options['num_disparities'] or int(np.ceil((source.target_disparity + 8) / 16) * 16)
+    engine = DisparityEngine(options['disparity_backend'], num_disparities, options['block_size'])
+    if options['incremental_disparity']:
+        engine = IncrementalDisparity(engine)
+    trackers = initialize_trackers(left, [point], options['tracker'])
+    telemetry = PipelineTelemetry(rss_interval=0.0)
+    disparity_pool = None
+    if options['disparity_workers'] > 0:
+        disparity_pool = SharedDisparityPool(left.shape, options['disparity_workers'], backend=options['disparity_backend'],
+                                             num_disparities=num_disparities, block_size=options['block_size'])
+
+    start = time.perf_counter()
+    try:
+        track = track_objects(source, trackers, [point], engine, roi_disparity=options['roi_disparity'],
+                              tracker_backend=options['tracker'], telemetry=telemetry, verbose=False,
+                              disparity_pool=disparity_pool)
+    finally:
+        if disparity_pool is not None:
+            disparity_pool.close()
+    elapsed = time.perf_counter() - start
+
+    # track의 frame_idx 0은 합성 클립의 1번 프레임 (0번은 초기화에 사용)
+    index = track['frame_idx'] + 1
+    true_x, true_y = source.trajectory(index)
+    position_error = np.hypot(track['x'] - true_x, track['y'] - true_y)
+    # 추적 성공: 위치 오차가 허용 오차(기본값: 대상 반지름의 절반) 이내
+    tolerance = options['position_tolerance'] or source.target_radius / 2
+    on_target = position_error <= tolerance
+    true_depth = disparity_to_depth(source.true_disparity(index, track['x'], track['y']))
+    valid = on_target & (track['depth'] > 0)
+    depth_error = np.abs(track['depth'][valid] - true_depth[valid]) / true_depth[valid] * 100
+    frames = max(1, telemetry.frame_count)
+
+    stages = telemetry.summary()
+    return {
+        'resolution': f"{width}x{height}",
+        'frames': telemetry.frame_count,
+        'fps': telemetry.frame_count / elapsed,
+        'stages_ms': {stage: stages[stage] for stage in STAGES + ('total',)},
+        'peak_rss_mb': float(telemetry.rss['rss_mb'][:telemetry.rss_count].max()),
+        'tracked_pct': 100.0 * len(np.unique(track['frame_idx'])) / frames,
+        'lost_pct': 100.0 - 100.0 * len(np.unique(track['frame_idx'][on_target])) / frames,
+        'position_tolerance_px': float(tolerance),
+        'position_error_px': float(np.median(position_error)) if len(track) else float('nan'),
+        'depth_valid_pct': float(100.0 * valid.sum() / max(1, on_target.sum())),
+        'depth_error_median_pct': float(np.median(depth_error)) if len(depth_error) else float('nan'),
+        'depth_error_p90_pct': float(np.percentile(depth_error, 90)) if len(depth_error) else float('nan'),
+    }
+
+
+def print_report(results):
+    header = (f"{'Resolution':<11} {'FPS':>7} {'Peak MB':>8} {'Tracked':>8} {'Lost':>7} {'Pos err':>8} "
+              f"{'Depth ok':>9} {'Depth err p50':>14} {'p90':>7}")
+    print(header)
+    print("=" * len(header))
+    for result in results:
+        print(f"{result['resolution']:<11} {result['fps']:>7.1f} {result['peak_rss_mb']:>8.1f} "
+              f"{result['tracked_pct']:>7.1f}% {result['lost_pct']:>6.1f}% {result['position_error_px']:>6.2f}px "
+              f"{result['depth_valid_pct']:>8.1f}% {result['depth_error_median_pct']:>13.2f}% "
+              f"{result['depth_error_p90_pct']:>6.2f}%")
+    print("Lost: 추적하지 못했거나 위치 오차가 허용 오차를 넘은 프레임 비율 (깊이 오차는 나머지 프레임에서만 계산)")
+
+    print()
+    header = f"{'Resolution':<11} " + ' '.join(f"{stage:>9}" for stage in STAGES + ('total',))
+    print(header + "   (mean ms per frame)")
+    print("=" * len(header))
+    for result in results:
+        print(f"{result['resolution']:<11} " + ' '.join(f"{result['stages_ms'][stage]:>9.2f}" for stage in STAGES + ('total',)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 스테레오 비디오 기반 파이프라인 벤치마크')
+    parser.add_argument('--resolutions', nargs='+', default=list(DEFAULT_RESOLUTIONS),
+                        help='측정할 해상도 목록 (예: 640x360 1920x1080)')
+    parser.add_argument('--frames', type=int, default=120, help='해상도별 처리할 프레임 수')
+    parser.add_argument('--disparity-backend', choices=BACKENDS, default='bm')
+    parser.add_argument('--num-disparities', type=int, default=0,
+                        help='disparity 탐색 범위 (기본값: 0, 해상도별 대상 disparity에 맞춰 자동 선택)')
+    parser.add_argument('--block-size', type=int, default=15)
+    parser.add_argument('--tracker', choices=TRACKER_BACKENDS, default='lk',
+                        help='추적기 백엔드 (기본값: lk, 모든 OpenCV 빌드에서 사용 가능)')
+    parser.add_argument('--roi-disparity', action='store_true')
+    parser.add_argument('--incremental-disparity', action='store_true',
+                        help='움직임이 생긴 타일만 disparity 재계산 (합성 클립은 배경이 정적)')
+    parser.add_argument('--disparity-workers', type=int, default=0,
+                        help='공유 메모리 링 기반 disparity 워커 프로세스 수 (기본값: 0, 단일 프로세스)')
+    parser.add_argument('--position-tolerance', type=float, default=0.0,
+                        help='추적 성공으로 보는 위치 오차 (px, 기본값: 0, 대상 반지름의 절반)')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 (실행 간 회귀 비교용)')
+    args = parser.parse_args()
+
+    options = {
+        'frames': args.frames,
+        'disparity_backend': args.disparity_backend,
+        'num_disparities': args.num_disparities,
+        'block_size': args.block_size,
+        'tracker': args.tracker,
+        'roi_disparity': args.roi_disparity,
+        'incremental_disparity': args.incremental_disparity,
+        'disparity_workers': args.disparity_workers,
+        'position_tolerance': args.position_tolerance,
+    }
+    results = []
+    for resolution in args.resolutions:
+        width, height = parse_resolution(resolution)
+        print(f"Running {args.frames} synthetic frames at {width}x{height}...")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results.append(executor.submit(run_resolution, width, height, options).result())
+
+    print()
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'options': options, 'results': results}, file, indent=2)
+        print(f"Results saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
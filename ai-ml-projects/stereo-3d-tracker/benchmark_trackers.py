@@ -0,0 +1,90 @@
+"""
+추적기 백엔드별 프레임당 지연 시간과 CSRT 대비 위치 편차(drift) 비교
+
+클립을 한 번 디코딩해 메모리에 올린 뒤 같은 프레임을 각 백엔드에 재생하므로
+디코딩 시간은 측정에서 제외됨
+"""
+
+import argparse
+import time
+import cv2
+import numpy as np
+from tracking import TRACKER_BACKENDS, initialize_tracker
+
+
+def load_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def replay(frames, point, backend):
+    """첫 프레임에서 초기화 후 나머지 프레임을 재생하며 (지연 시간 ms, 중심 좌표, 성공 여부)를 기록함"""
+    tracker = initialize_tracker(frames[0], point, backend)
+    latencies = np.zeros(len(frames) - 1)
+    centers = np.full((len(frames) - 1, 2), np.nan)
+    for i, frame in enumerate(frames[1:]):
+        start = time.perf_counter()
+        success, bbox = tracker.update(frame)
+        latencies[i] = (time.perf_counter() - start) * 1000
+        if success:
+            x, y, w, h = bbox
+            centers[i] = (x + w / 2, y + h / 2)
+    return latencies, centers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='추적기 백엔드 지연 시간/편차 벤치마크')
+    parser.add_argument('video', help='재생할 (왼쪽) 비디오 경로')
+    parser.add_argument('--point', type=float, nargs=2, metavar=('X', 'Y'), required=True,
+                        help='첫 프레임에서 추적을 시작할 좌표')
+    parser.add_argument('--backends', nargs='+', choices=TRACKER_BACKENDS, default=list(TRACKER_BACKENDS))
+    parser.add_argument('--reference', choices=TRACKER_BACKENDS, default='csrt', help='편차 기준 백엔드')
+    parser.add_argument('--frames', type=int, default=300, help='재생할 최대 프레임 수')
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    if len(frames) < 2:
+        print("Error: Need at least two frames.")
+        return
+    print(f"Replaying {len(frames)} frames from {args.video}")
+
+    backends = list(dict.fromkeys([args.reference] + args.backends))
+    results = {}
+    for backend in backends:
+        try:
+            results[backend] = replay(frames, args.point, backend)
+        except RuntimeError as exc:
+            print(f"Skipping {backend}: {exc}")
+
+    reference = results.get(args.reference)
+    if reference is None:
+        print(f"Warning: reference backend '{args.reference}' unavailable, drift not reported.")
+
+    header = f"{'Backend':<8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'Success':>8} {'Drift mean':>11} {'Drift max':>10}"
+    print(header)
+    print("=" * len(header))
+    for backend in args.backends:
+        if backend not in results:
+            continue
+        latencies, centers = results[backend]
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        success = np.mean(~np.isnan(centers[:, 0])) * 100
+        drift_mean = drift_max = float('nan')
+        if reference is not None:
+            drift = np.linalg.norm(centers - reference[1], axis=1)
+            drift = drift[~np.isnan(drift)]
+            if len(drift):
+                drift_mean, drift_max = drift.mean(), drift.max()
+        print(f"{backend:<8} {p50:>8.2f} {p90:>8.2f} {p99:>8.2f} {latencies.max():>8.2f} {success:>7.1f}% "
+              f"{drift_mean:>10.2f}px {drift_max:>9.2f}px")
+
+
+if __name__ == '__main__':
+    main()
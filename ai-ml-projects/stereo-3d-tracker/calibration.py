@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+
+# 캘리브레이션 파일 항목 (npz 키 또는 OpenCV FileStorage yml/xml 노드 이름)
+#   K1, D1, K2, D2 : 좌/우 카메라 내부 행렬과 왜곡 계수
+#   R, T           : 왼쪽 -> 오른쪽 카메라 회전/이동 (T 단위가 깊이 단위가 됨)
+#   image_size     : 캘리브레이션 시 이미지 크기 (width, height)
+CALIBRATION_KEYS = ('K1', 'D1', 'K2', 'D2', 'R', 'T', 'image_size')
+
+
+class StereoCalibration:
+    """스테레오 카메라 내부/외부 파라미터"""
+
+    def __init__(self, K1, D1, K2, D2, R, T, image_size):
+        self.K1 = np.asarray(K1, dtype=np.float64)
+        self.D1 = np.asarray(D1, dtype=np.float64)
+        self.K2 = np.asarray(K2, dtype=np.float64)
+        self.D2 = np.asarray(D2, dtype=np.float64)
+        self.R = np.asarray(R, dtype=np.float64)
+        self.T = np.asarray(T, dtype=np.float64).reshape(3, 1)
+        self.image_size = tuple(int(v) for v in np.ravel(image_size)[:2])
+
+    @classmethod
+    def load(cls, path):
+        """npz 또는 OpenCV yml/xml 파일에서 캘리브레이션을 읽음"""
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return cls(**{key: data[key] for key in CALIBRATION_KEYS})
+
+        storage = cv2.FileStorage(path, cv2.FILE_STORAGE_READ)
+        if not storage.isOpened():
+            raise IOError(f"Could not open calibration file {path}")
+        try:
+            values = {}
+            for key in CALIBRATION_KEYS:
+                node = storage.getNode(key)
+                if node.empty():
+                    raise KeyError(f"Calibration file {path} has no '{key}' entry")
+                values[key] = node.mat()
+        finally:
+            storage.release()
+        return cls(**values)
+
+    def build_rectifier(self, left_size, right_size, output_size=None):
+        """입력 해상도에 맞춘 정렬(rectification) 조회 테이블을 한 번만 계산함
+
+        left_size/right_size는 실제 입력 프레임의 (width, height), output_size는 정렬 후 크기
+        (기본값: 왼쪽 입력 크기)이며, 정렬과 크기 변환을 한 번의 remap으로 처리함
+        """
+        output_size = tuple(output_size or left_size)
+        R1, R2, P1, P2, _, _, _ = cv2.stereoRectify(
+            self.K1, self.D1, self.K2, self.D2, self.image_size, self.R, self.T,
+            flags=cv2.CALIB_ZERO_DISPARITY, alpha=0)
+
+        # 캘리브레이션 해상도 기준 투영 행렬을 출력 해상도로 스케일
+        sx = output_size[0] / self.image_size[0]
+        sy = output_size[1] / self.image_size[1]
+        scale = np.diag([sx, sy, 1.0])
+        P1, P2 = scale @ P1, scale @ P2
+
+        maps_left = cv2.initUndistortRectifyMap(
+            scale_intrinsics(self.K1, left_size, self.image_size), self.D1, R1, P1, output_size, cv2.CV_16SC2)
+        maps_right = cv2.initUndistortRectifyMap(
+            scale_intrinsics(self.K2, right_size, self.image_size), self.D2, R2, P2, output_size, cv2.CV_16SC2)
+        return StereoRectifier(maps_left, maps_right, reprojection_matrix(P1, P2), output_size)
+
+
+class StereoRectifier:
+    """고정소수점(CV_16SC2) 조회 테이블로 프레임마다 cv2.remap 한 번씩만 수행함"""
+
+    def __init__(self, maps_left, maps_right, Q, output_size):
+        self.maps_left = maps_left
+        self.maps_right = maps_right
+        self.Q = Q
+        self.output_size = output_size
+
+    def rectify(self, frame_left, frame_right):
+        left = cv2.remap(frame_left, *self.maps_left, cv2.INTER_LINEAR)
+        right = cv2.remap(frame_right, *self.maps_right, cv2.INTER_LINEAR)
+        return left, right
+
+
+def scale_intrinsics(K, frame_size, calibration_size):
+    """캘리브레이션 해상도와 다른 입력 프레임에 맞게 내부 행렬을 스케일함"""
+    sx = frame_size[0] / calibration_size[0]
+    sy = frame_size[1] / calibration_size[1]
+    return np.diag([sx, sy, 1.0]) @ K
+
+
+def reprojection_matrix(P1, P2):
+    """정렬된 투영 행렬에서 disparity -> 3D 재투영 행렬 Q를 구성함"""
+    f = P1[0, 0]
+    cx, cy = P1[0, 2], P1[1, 2]
+    cx_right = P2[0, 2]
+    Tx = P2[0, 3] / P2[0, 0]
+    return np.array([
+        [1, 0, 0, -cx],
+        [0, 1, 0, -cy],
+        [0, 0, 0, f],
+        [0, 0, -1 / Tx, (cx - cx_right) / Tx],
+    ], dtype=np.float64)
+
+
+def create_rectifier(path, frame_left, frame_right):
+    """캘리브레이션 파일을 읽어 첫 프레임 해상도에 맞는 StereoRectifier를 만듦"""
+    calibration = StereoCalibration.load(path)
+    left_size = frame_left.shape[1::-1]
+    right_size = frame_right.shape[1::-1]
+    return calibration.build_rectifier(left_size, right_size)
@@ -0,0 +1,264 @@
+import cv2
+import numpy as np
+
+BACKENDS = ('bm', 'sgbm', 'pyramid')
+
+
+class DisparityEngine:
+    """세션마다 한 번 생성해 재사용하는 disparity 계산기
+
+    backend
+        'bm'      : StereoBM (가장 빠름)
+        'sgbm'    : StereoSGBM (정확도 우선)
+        'pyramid' : 1/2 해상도에서 StereoBM 매칭 후 원본 해상도에서 ±1 픽셀 정제
+    출력은 항상 픽셀 단위 float32 이며, 유효하지 않은 값은 0으로 표시함
+    """
+
+    def __init__(self, backend='bm', num_disparities=64, block_size=15):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown disparity backend: {backend} (choose from {', '.join(BACKENDS)})")
+        if num_disparities <= 0 or num_disparities % 16 != 0:
+            raise ValueError("num_disparities must be a positive multiple of 16.")
+        self.backend = backend
+        self.num_disparities = num_disparities
+        self.block_size = block_size
+
+        if backend == 'pyramid':
+            self.matcher = create_matcher('bm', *coarse_parameters(num_disparities, block_size))
+            self._coarse_matcher = self.matcher
+        else:
+            self.matcher = create_matcher(backend, num_disparities, block_size)
+            self._coarse_matcher = None
+        self._grid = None
+
+    def compute(self, left_gray, right_gray):
+        """좌/우 그레이스케일 이미지에서 float32 disparity map을 계산함"""
+        if self.backend == 'pyramid':
+            return self._compute_pyramid(left_gray, right_gray)
+        return self._match(self.matcher, left_gray, right_gray)
+
+    def compute_coarse(self, left_gray, right_gray):
+        """1/2 해상도에서만 매칭하고 원본 크기로 늘림 (정제 생략, 처리 시간이 부족할 때 사용)"""
+        if self._coarse_matcher is None:
+            self._coarse_matcher = create_matcher(self.backend, *coarse_parameters(self.num_disparities, self.block_size))
+        height, width = left_gray.shape[:2]
+        coarse = self._match(self._coarse_matcher, cv2.pyrDown(left_gray), cv2.pyrDown(right_gray))
+        return cv2.resize(coarse, (width, height), interpolation=cv2.INTER_NEAREST) * 2.0
+
+    def compute_roi(self, left_gray, right_gray, bboxes, margin=0):
+        """bbox 행 범위와 왼쪽 탐색 여유(num_disparities)만 포함한 띠 영역에서만 disparity를 계산함
+
+        bboxes는 (x, y, w, h) 목록이며, 결과는 전체 크기 map이고 띠 밖은 0임
+        """
+        height, width = left_gray.shape[:2]
+        disparity = np.zeros((height, width), dtype=np.float32)
+        for x0, y0, x1, y1 in self.roi_bands(bboxes, (height, width), margin):
+            band = self.compute(left_gray[y0:y1, x0:x1], right_gray[y0:y1, x0:x1])
+            # 띠가 겹치면 탐색 여유 때문에 무효(0)가 된 쪽보다 유효값을 우선함
+            target = disparity[y0:y1, x0:x1]
+            np.maximum(target, band, out=target)
+        return disparity
+
+    def roi_bands(self, bboxes, shape, margin=0):
+        """bbox마다 매칭에 필요한 띠 영역 (x0, y0, x1, y1)을 계산함"""
+        height, width = shape
+        pad = self.block_size // 2 + margin
+        min_width = self.num_disparities + self.block_size + 1
+        bands = []
+        for x, y, w, h in bboxes:
+            y0, y1 = max(0, y - pad), min(height, y + h + pad)
+            x0, x1 = max(0, x - self.num_disparities - pad), min(width, x + w + pad)
+            # 매처가 요구하는 최소 크기 확보
+            if x1 - x0 < min_width:
+                x1 = min(width, x0 + min_width)
+                x0 = max(0, x1 - min_width)
+            if y1 - y0 < self.block_size:
+                y1 = min(height, y0 + self.block_size)
+                y0 = max(0, y1 - self.block_size)
+            if x1 > x0 and y1 > y0:
+                bands.append((x0, y0, x1, y1))
+        return bands
+
+    @staticmethod
+    def _match(matcher, left_gray, right_gray):
+        disparity = matcher.compute(left_gray, right_gray).astype(np.float32) / 16.0
+        disparity[disparity < 0] = 0
+        return disparity
+
+    def _compute_pyramid(self, left_gray, right_gray):
+        return self._refine(left_gray, right_gray, self.compute_coarse(left_gray, right_gray))
+
+    def _refine(self, left_gray, right_gray, initial):
+        """거친 disparity 주변 ±1 픽셀에서 SAD 비용이 최소인 값을 골라 서브픽셀까지 보정함"""
+        height, width = left_gray.shape[:2]
+        if self._grid is None or self._grid[0].shape != (height, width):
+            map_x, map_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+            self._grid = (map_x, map_y)
+        map_x, map_y = self._grid
+
+        left = left_gray.astype(np.float32)
+        right = right_gray.astype(np.float32)
+        ksize = (self.block_size, self.block_size)
+        costs = np.empty((3, height, width), dtype=np.float32)
+        for i, delta in enumerate((-1.0, 0.0, 1.0)):
+            warped = cv2.remap(right, map_x - (initial + delta), map_y, cv2.INTER_LINEAR,
+                               borderMode=cv2.BORDER_REPLICATE)
+            costs[i] = cv2.blur(cv2.absdiff(left, warped), ksize)
+
+        best = np.argmin(costs, axis=0)
+        refined = initial + best.astype(np.float32) - 1.0
+
+        # 가운데가 최소일 때 포물선 보간으로 서브픽셀 오프셋 추가
+        denom = costs[0] - 2 * costs[1] + costs[2]
+        center = (best == 1) & (denom > 1e-6)
+        refined[center] += 0.5 * (costs[0][center] - costs[2][center]) / denom[center]
+
+        refined[initial <= 0] = 0
+        return refined
+
+
+class IncrementalDisparity:
+    """직전 disparity map을 유지하고 프레임 차이로 움직임이 생긴 타일만 다시 계산하는 래퍼
+
+    고정된 카메라처럼 배경이 정적인 장면에서 매칭 작업량을 줄임. 오른쪽 영상의 변화는
+    왼쪽 영상 기준 오른쪽으로 num_disparities 범위까지 영향을 주므로 그만큼 마스크를 넓히고,
+    refresh_interval 프레임마다 (또는 변한 타일이 full_ratio 이상이면) 전체를 다시 계산해 오차 누적을 막음
+    """
+
+    def __init__(self, engine, tile_size=64, pixel_threshold=15, tile_ratio=0.01, refresh_interval=30, full_ratio=0.5):
+        self.engine = engine
+        self.tile_size = tile_size
+        self.pixel_threshold = pixel_threshold
+        self.tile_ratio = tile_ratio
+        self.refresh_interval = refresh_interval
+        self.full_ratio = full_ratio
+        self.frames = 0
+        self.full_refreshes = 0
+        self.recomputed_tiles = 0
+        self.total_tiles = 0
+        self.reset()
+
+    @property
+    def num_disparities(self):
+        return self.engine.num_disparities
+
+    @property
+    def block_size(self):
+        return self.engine.block_size
+
+    def reset(self):
+        """유지하던 disparity를 버려 다음 프레임에서 전체를 다시 계산하게 함"""
+        self._disparity = None
+        self._previous = None
+        self._since_refresh = 0
+
+    def compute(self, left_gray, right_gray):
+        height, width = left_gray.shape[:2]
+        tiles_y, tiles_x = -(-height // self.tile_size), -(-width // self.tile_size)
+        self.frames += 1
+        self.total_tiles += tiles_y * tiles_x
+
+        refresh = (self._disparity is None or self._disparity.shape != (height, width)
+                   or self._since_refresh >= self.refresh_interval)
+        if not refresh:
+            changed = self._changed_tiles(left_gray, right_gray, tiles_y, tiles_x)
+            refresh = changed.mean() >= self.full_ratio
+        self._previous = (left_gray, right_gray)
+        if refresh:
+            self._disparity = self.engine.compute(left_gray, right_gray)
+            self._since_refresh = 0
+            self.full_refreshes += 1
+            self.recomputed_tiles += tiles_y * tiles_x
+            return self._disparity.copy()
+
+        self._since_refresh += 1
+        self.recomputed_tiles += int(changed.sum())
+        for x, y, w, h in self._tile_runs(changed, width, height):
+            (x0, y0, x1, y1), = self.engine.roi_bands([(x, y, w, h)], (height, width))
+            band = self.engine.compute(left_gray[y0:y1, x0:x1], right_gray[y0:y1, x0:x1])
+            self._disparity[y:y + h, x:x + w] = band[y - y0:y - y0 + h, x - x0:x - x0 + w]
+        return self._disparity.copy()
+
+    def compute_roi(self, left_gray, right_gray, bboxes, margin=0):
+        self.reset()
+        return self.engine.compute_roi(left_gray, right_gray, bboxes, margin)
+
+    def compute_coarse(self, left_gray, right_gray):
+        self.reset()
+        return self.engine.compute_coarse(left_gray, right_gray)
+
+    def roi_bands(self, bboxes, shape, margin=0):
+        return self.engine.roi_bands(bboxes, shape, margin)
+
+    def recomputed_ratio(self):
+        """지금까지 다시 계산한 타일 비율 (1.0이면 매 프레임 전체 계산과 같음)"""
+        return self.recomputed_tiles / self.total_tiles if self.total_tiles else 1.0
+
+    def _changed_tiles(self, left_gray, right_gray, tiles_y, tiles_x):
+        previous_left, previous_right = self._previous
+        size = (tiles_x * self.tile_size, tiles_y * self.tile_size)
+        changed = []
+        for current, previous in ((left_gray, previous_left), (right_gray, previous_right)):
+            moving = (cv2.absdiff(current, previous) > self.pixel_threshold).astype(np.float32)
+            # 타일 크기의 배수로 채운 뒤 타일별 변한 픽셀 비율을 구함
+            moving = cv2.copyMakeBorder(moving, 0, size[1] - moving.shape[0], 0, size[0] - moving.shape[1],
+                                        cv2.BORDER_CONSTANT, value=0)
+            ratio = moving.reshape(tiles_y, self.tile_size, tiles_x, self.tile_size).mean(axis=(1, 3))
+            changed.append(ratio > self.tile_ratio)
+        changed_left, changed_right = changed
+
+        # 오른쪽 영상의 변화는 왼쪽 영상 기준 x ~ x + num_disparities 위치의 매칭 결과를 바꿈
+        reach = -(-self.engine.num_disparities // self.tile_size)
+        spread = changed_right.copy()
+        for shift in range(1, reach + 1):
+            spread[:, shift:] |= changed_right[:, :-shift]
+        changed = changed_left | spread
+        # 블록 매칭 창이 타일 경계를 넘으므로 이웃 타일까지 포함
+        return cv2.dilate(changed.astype(np.uint8), np.ones((3, 3), np.uint8)).astype(bool)
+
+    def _tile_runs(self, changed, width, height):
+        """변한 타일을 행마다 가로로 이어진 구간 (x, y, w, h)으로 묶음"""
+        size = self.tile_size
+        for row, line in enumerate(changed):
+            padded = np.concatenate(([False], line, [False]))
+            edges = np.flatnonzero(padded[1:] != padded[:-1])
+            for start, stop in zip(edges[::2], edges[1::2]):
+                x, y = start * size, row * size
+                yield x, y, min(width, stop * size) - x, min(height, y + size) - y
+
+
+def coarse_parameters(num_disparities, block_size):
+    """절반 해상도 매칭용 탐색 범위와 블록 크기 (둘 다 절반으로 줄임)"""
+    coarse_disparities = max(16, (num_disparities // 2 + 15) // 16 * 16)
+    coarse_block = max(5, (block_size // 2) | 1)
+    return coarse_disparities, coarse_block
+
+
+def create_matcher(backend, num_disparities, block_size):
+    """OpenCV 스테레오 매처를 설정해서 생성함"""
+    if backend == 'sgbm':
+        channels = 1
+        return cv2.StereoSGBM_create(
+            minDisparity=0,
+            numDisparities=num_disparities,
+            blockSize=block_size,
+            P1=8 * channels * block_size ** 2,
+            P2=32 * channels * block_size ** 2,
+            disp12MaxDiff=1,
+            preFilterCap=31,
+            uniquenessRatio=15,
+            speckleWindowSize=100,
+            speckleRange=32,
+            mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY,
+        )
+
+    stereo = cv2.StereoBM_create(numDisparities=num_disparities, blockSize=block_size)
+    stereo.setPreFilterType(cv2.STEREO_BM_PREFILTER_XSOBEL)
+    stereo.setPreFilterSize(9)
+    stereo.setPreFilterCap(31)
+    stereo.setMinDisparity(0)
+    stereo.setTextureThreshold(10)
+    stereo.setUniquenessRatio(15)
+    stereo.setSpeckleRange(32)
+    stereo.setSpeckleWindowSize(100)
+    return stereo
@@ -1,18 +1,103 @@
 import cv2
+import numpy as np
+from tracking import BBOX_SIZE
+from reacquire import to_gray
 
-def get_initial_points(left_img, right_img):
-    left_gray = cv2.cvtColor(left_img, cv2.COLOR_BGR2GRAY)
-    right_gray = cv2.cvtColor(right_img, cv2.COLOR_BGR2GRAY)
+FLANN_INDEX_LSH = 6
+
+
+def detect_grid_features(gray, orb, grid=(8, 6), per_cell=8, max_width=1280):
+    """이미지를 격자로 나눠 칸마다 응답이 큰 특징점을 per_cell개까지만 남기고 디스크립터를 계산함
+
+    특징점이 질감이 강한 한 영역에 몰리지 않아 후보 지점이 프레임 전체에 고르게 분포함.
+    폭이 max_width보다 크면 축소한 영상에서 검출하고, 디스크립터는 남긴 특징점만 원본 해상도에서 계산함
+    """
+    height, width = gray.shape[:2]
+    scale = width / max_width if max_width and width > max_width else 1.0
+    if scale > 1.0:
+        small = cv2.resize(gray, (max_width, int(round(height / scale))), interpolation=cv2.INTER_AREA)
+        keypoints = [cv2.KeyPoint(kp.pt[0] * scale, kp.pt[1] * scale, kp.size * scale, kp.angle, kp.response,
+                                  kp.octave, kp.class_id) for kp in orb.detect(small, None)]
+    else:
+        keypoints = orb.detect(gray, None)
+    if not keypoints:
+        return [], None
+    points = np.array([kp.pt for kp in keypoints], dtype=np.float32)
+    responses = np.array([kp.response for kp in keypoints], dtype=np.float32)
+    columns = np.minimum((points[:, 0] * grid[0] / width).astype(np.intp), grid[0] - 1)
+    rows = np.minimum((points[:, 1] * grid[1] / height).astype(np.intp), grid[1] - 1)
+    cells = rows * grid[0] + columns
+
+    # 칸 번호, 응답 내림차순으로 정렬한 뒤 칸 안에서의 순위가 per_cell 미만인 것만 남김
+    order = np.lexsort((-responses, cells))
+    sorted_cells = cells[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_cells, sorted_cells, side='left')
+    keypoints = [keypoints[i] for i in order[rank < per_cell]]
+    return orb.compute(gray, keypoints)
+
+
+def match_features(des_left, des_right, ratio=0.75):
+    """FLANN LSH 인덱스로 최근접 2개를 찾고 비율 검사를 통과한 (query, train, score)를 반환함
 
-    orb = cv2.ORB_create()
-    kp_left, des_left = orb.detectAndCompute(left_gray, None)
-    kp_right, des_right = orb.detectAndCompute(right_gray, None)
+    score는 1 - (최근접 거리 / 두 번째 거리)로 0~1 사이이며 클수록 구별력이 큰 매칭임
+    """
+    if des_left is None or des_right is None or len(des_left) == 0 or len(des_right) < 2:
+        return np.empty(0, np.intp), np.empty(0, np.intp), np.empty(0, np.float32)
+    matcher = cv2.FlannBasedMatcher(dict(algorithm=FLANN_INDEX_LSH, table_number=6, key_size=12, multi_probe_level=1),
+                                    dict(checks=50))
+    queries, trains, scores = [], [], []
+    for pair in matcher.knnMatch(des_left, des_right, k=2):
+        # LSH는 후보가 부족하면 이웃을 2개보다 적게 돌려줄 수 있음
+        if len(pair) < 2 or pair[0].distance >= ratio * pair[1].distance:
+            continue
+        queries.append(pair[0].queryIdx)
+        trains.append(pair[0].trainIdx)
+        scores.append(1.0 - pair[0].distance / max(pair[1].distance, 1e-6))
+    return np.array(queries, np.intp), np.array(trains, np.intp), np.array(scores, np.float32)
 
-    bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-    matches = bf.match(des_left, des_right)
-    matches = sorted(matches, key=lambda x: x.distance)
 
-    point_left = kp_left[matches[0].queryIdx].pt
-    point_right = kp_right[matches[0].trainIdx].pt
+def select_spread(points, scores, k, min_distance, oversample=8):
+    """점수 상위 k × oversample개만 부분 선택(argpartition)한 뒤 서로 min_distance 이상 떨어진 k개를 고름"""
+    count = min(len(scores), k * oversample)
+    if count == 0:
+        return np.empty(0, np.intp)
+    top = np.argpartition(-scores, count - 1)[:count] if count < len(scores) else np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind='stable')]
+    chosen = []
+    for i in top:
+        if all(np.hypot(*(points[i] - points[j])) >= min_distance for j in chosen):
+            chosen.append(i)
+            if len(chosen) == k:
+                break
+    return np.array(chosen, np.intp)
 
-    return point_left, point_right
+
+def find_initial_candidates(left_img, right_img, k=5, min_distance=2 * BBOX_SIZE, max_row_diff=None,
+                            nfeatures=1000, grid=(8, 6), per_cell=8, ratio=0.75, max_width=1280):
+    """좌/우 첫 프레임에서 추적 시작 후보 k개를 찾음
+
+    반환값은 (points_left, points_right, scores)이며 각각 (n, 2), (n, 2), (n,) 배열 (n <= k, 점수 내림차순).
+    max_row_diff를 주면 정렬된 스테레오 쌍이라 가정하고 행 차이가 큰 매칭을 버림
+    """
+    # 좌/우 영상 사이에는 크기 변화가 없으므로 스케일 피라미드 없이 한 단계에서만 검출
+    orb = cv2.ORB_create(nfeatures=nfeatures, nlevels=1)
+    kp_left, des_left = detect_grid_features(to_gray(left_img), orb, grid, per_cell, max_width)
+    kp_right, des_right = detect_grid_features(to_gray(right_img), orb, grid, per_cell, max_width)
+    queries, trains, scores = match_features(des_left, des_right, ratio)
+
+    points_left = np.array([kp_left[i].pt for i in queries], dtype=np.float32).reshape(-1, 2)
+    points_right = np.array([kp_right[i].pt for i in trains], dtype=np.float32).reshape(-1, 2)
+    if max_row_diff is not None:
+        keep = np.abs(points_left[:, 1] - points_right[:, 1]) <= max_row_diff
+        points_left, points_right, scores = points_left[keep], points_right[keep], scores[keep]
+
+    chosen = select_spread(points_left, scores, k, min_distance)
+    return points_left[chosen], points_right[chosen], scores[chosen]
+
+
+def get_initial_points(left_img, right_img):
+    """가장 점수가 높은 후보 하나의 (point_left, point_right)를 반환함"""
+    points_left, points_right, _ = find_initial_candidates(left_img, right_img, k=1)
+    if len(points_left) == 0:
+        raise RuntimeError("No feature matches found between the initial frames.")
+    return tuple(map(float, points_left[0])), tuple(map(float, points_right[0]))
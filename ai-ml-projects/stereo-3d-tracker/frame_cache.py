@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import queue
+import shutil
+import threading
+import numpy as np
+from track_store import META_FILE
+from utils import ensure_output_folder
+
+CACHE_VERSION = 1
+CACHE_FOLDER = 'cache'
+# 프레임마다 저장할 수 있는 배열 (이름, dtype): 정렬/크기 맞춤 후 BGR 좌/우, 평활화 그레이 좌/우, disparity
+# 오른쪽 BGR 프레임은 이미지 저장에만 쓰이므로 필요할 때만 저장함 (include_right)
+CACHE_ARRAYS = (('left', 'u1'), ('right', 'u1'), ('left_gray', 'u1'), ('right_gray', 'u1'), ('disparity', 'f4'))
+
+_STOP = object()
+
+
+def file_digest(path, chunk_size=4 * 2**20):
+    """파일 내용의 BLAKE2b 해시 (디코딩보다 훨씬 싸게 전체 파일을 읽음)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(left_path, right_path, params):
+    """좌/우 비디오 내용과 disparity 등 결과에 영향을 주는 파라미터로 캐시 키를 만듦"""
+    description = {
+        'version': CACHE_VERSION,
+        'left': file_digest(left_path),
+        'right': file_digest(right_path),
+        'params': params,
+    }
+    return hashlib.blake2b(json.dumps(description, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+class FrameCache:
+    """키별 폴더에 프레임 배열을 컬럼처럼 이어 쓰고 메모리 맵으로 읽는 디스크 캐시
+
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 지움 (meta.json 수정 시각 기준)
+    """
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=20 * 2**30):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        ensure_output_folder(folder)
+
+    def open(self, key, need_right=False):
+        """완성된 캐시 항목이 있으면 CacheEntry를, 없으면 None을 반환함
+
+        need_right인데 항목에 오른쪽 BGR 프레임이 없으면 없는 것으로 취급함 (다시 쓰면 같은 키를 덮어씀)
+        """
+        path = os.path.join(self.folder, key)
+        try:
+            with open(os.path.join(path, META_FILE)) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if not meta.get('complete') or (need_right and 'right' not in meta['arrays']):
+            return None
+        os.utime(os.path.join(path, META_FILE))  # LRU 순서 갱신
+        return CacheEntry(path, meta)
+
+    def writer(self, key, info=None, include_right=True, expected_frames=None):
+        """새 캐시 항목을 쓰는 CacheWriter를 만듦 (같은 키의 미완성 항목은 지움)
+
+        항목 하나가 max_bytes를 넘을 수 없으며, expected_frames를 주면 첫 프레임에서 예상 크기로 미리 검사함
+        """
+        path = os.path.join(self.folder, key)
+        shutil.rmtree(path, ignore_errors=True)
+        names = tuple(name for name, _ in CACHE_ARRAYS if include_right or name != 'right')
+        return CacheWriter(path, info, names=names, max_bytes=self.max_bytes, expected_frames=expected_frames,
+                           on_complete=lambda: self.evict(keep=key))
+
+    def evict(self, keep=None):
+        """전체 크기가 max_bytes 이하가 될 때까지 오래된 항목을 지움"""
+        entries = []
+        for key in os.listdir(self.folder):
+            path = os.path.join(self.folder, key)
+            if not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            meta_path = os.path.join(path, META_FILE)
+            used = os.path.getmtime(meta_path) if os.path.exists(meta_path) else 0.0
+            entries.append((used, key, path, size))
+        total = sum(entry[3] for entry in entries)
+        for used, key, path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            print(f"Evicted cache entry {key} ({size / 2**20:.0f} MB)")
+
+
+class CacheWriter:
+    """프레임 배열을 백그라운드 스레드에서 배열별 바이너리 파일 끝에 이어 씀
+
+    close(complete=True)일 때만 meta.json에 완료 표시를 남기며, 중간에 멈춘 항목은 지움.
+    크기가 max_bytes를 넘을 것으로 예상되거나 실제로 넘으면 쓰기를 중단하고 항목을 남기지 않음
+    """
+
+    def __init__(self, path, info=None, queue_size=16, on_complete=None, names=None, max_bytes=None,
+                 expected_frames=None):
+        self.path = path
+        self.info = info or {}
+        self.names = names or tuple(name for name, _ in CACHE_ARRAYS)
+        self.dtypes = {name: dtype for name, dtype in CACHE_ARRAYS if name in self.names}
+        self.max_bytes = max_bytes
+        self.expected_frames = expected_frames
+        self.length = 0
+        self.shapes = None
+        self.frame_bytes = 0
+        self.aborted = False
+        self._on_complete = on_complete
+        self._error = None
+        ensure_output_folder(path)
+        self._files = {name: open(array_path(path, name), 'wb') for name in self.names}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def append(self, left, right, left_gray, right_gray, disparity):
+        if self.aborted:
+            return
+        if self._error is not None:
+            raise RuntimeError(f"Frame cache writer failed: {self._error}")
+        frame = (left, right, left_gray, right_gray, disparity)
+        arrays = {name: array for (name, _), array in zip(CACHE_ARRAYS, frame) if name in self.dtypes}
+        if self.shapes is None:
+            self.shapes = {name: array.shape for name, array in arrays.items()}
+            self.frame_bytes = sum(int(np.prod(shape)) * np.dtype(self.dtypes[name]).itemsize
+                                   for name, shape in self.shapes.items())
+            if (self.max_bytes is not None and self.expected_frames
+                    and self.frame_bytes * self.expected_frames > self.max_bytes):
+                self._abort(f"projected {self.frame_bytes * self.expected_frames / 2**20:.0f} MB "
+                            f"for {self.expected_frames} frames")
+                return
+        if self.max_bytes is not None and (self.length + 1) * self.frame_bytes > self.max_bytes:
+            self._abort(f"more than {self.length} frames")
+            return
+        self._queue.put(arrays)
+        self.length += 1
+
+    def _abort(self, reason):
+        self.aborted = True
+        print(f"Frame cache not written: {reason} exceed the {self.max_bytes / 2**20:.0f} MB cache limit.")
+
+    def close(self, complete=True):
+        self._queue.put(_STOP)
+        self._thread.join()
+        for file in self._files.values():
+            file.close()
+        if not complete or self.aborted or self._error is not None or self.length == 0:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return False
+        meta = {
+            'complete': True,
+            'length': self.length,
+            'arrays': {name: {'dtype': dtype, 'shape': list(self.shapes[name])} for name, dtype in self.dtypes.items()},
+            'info': self.info,
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as file:
+            json.dump(meta, file)
+        print(f"Cached {self.length} frames to {self.path}")
+        if self._on_complete is not None:
+            self._on_complete()
+        return True
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if self._error is not None:
+                continue
+            try:
+                for name, array in item.items():
+                    self._files[name].write(np.ascontiguousarray(array, dtype=self.dtypes[name]).tobytes())
+            except Exception as exc:  # 쓰기 실패는 다음 append/close에서 처리
+                self._error = exc
+
+
+class CacheEntry:
+    """완성된 캐시 항목의 배열들을 (프레임 수, ...) 모양의 읽기 전용 메모리 맵으로 엶"""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.length = meta['length']
+        self.info = meta.get('info', {})
+        self.arrays = {
+            name: np.memmap(array_path(path, name), dtype=np.dtype(spec['dtype']), mode='r',
+                            shape=(self.length, *spec['shape']))
+            for name, spec in meta['arrays'].items()
+        }
+
+    def frame(self, index):
+        """index번 프레임의 (left, right, left_gray, right_gray, disparity) 배열 (복사 없음, 저장하지 않은 배열은 None)"""
+        return tuple(np.asarray(self.arrays[name][index]) if name in self.arrays else None
+                     for name, _ in CACHE_ARRAYS)
+
+
+class CachedFrameSource:
+    """캐시 항목에서 프레임을 읽는 소스 (StereoFrameSource와 같은 read() 인터페이스)
+
+    read()는 정렬/크기 맞춤이 끝난 BGR 좌/우 프레임을 반환하고, 같은 프레임의 평활화 그레이 쌍과
+    disparity는 products()로 얻음. 디코딩과 스테레오 매칭을 모두 건너뜀
+    """
+
+    def __init__(self, entry, start=1):
+        self.entry = entry
+        self._index = start
+        self._products = None
+
+    def read(self):
+        if self._index >= self.entry.length:
+            return False, None, None
+        left, right, *self._products = self.entry.frame(self._index)
+        self._index += 1
+        return True, left, right
+
+    def products(self):
+        """마지막으로 읽은 프레임의 (left_gray, right_gray, disparity)"""
+        return tuple(self._products)
+
+    def release(self):
+        self._index = self.entry.length
+
+
+def array_path(path, name):
+    return os.path.join(path, f"{name}.bin")
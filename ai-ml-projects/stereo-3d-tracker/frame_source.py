@@ -0,0 +1,88 @@
+import queue
+import threading
+
+_END_OF_STREAM = object()
+
+
+class StereoFrameSource:
+    """좌/우 카메라를 각각 별도 스레드에서 미리 디코딩하는 스테레오 프레임 소스"""
+
+    def __init__(self, cap_left, cap_right, buffer_size=8):
+        self.cap_left = cap_left
+        self.cap_right = cap_right
+        self._stop = threading.Event()
+        # 카메라별 고정 크기 버퍼: 가득 차면 디코딩 스레드가 대기함 (backpressure)
+        self._queues = (queue.Queue(maxsize=buffer_size), queue.Queue(maxsize=buffer_size))
+        self._threads = [
+            threading.Thread(target=self._decode_loop, args=(cap, q), daemon=True)
+            for cap, q in zip((cap_left, cap_right), self._queues)
+        ]
+        self._finished = False
+        self._error = None
+        for thread in self._threads:
+            thread.start()
+
+    def _decode_loop(self, cap, frames):
+        # 디코딩 중 예외가 나도 종료 표시는 항상 넣어 read()가 무한히 기다리지 않게 하고, 예외는 read()에서 다시 발생시킴
+        try:
+            while not self._stop.is_set():
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                if not self._put(frames, frame):
+                    return
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self._put(frames, _END_OF_STREAM)
+
+    def _put(self, frames, item):
+        # 소비자가 멈춘 뒤에도 스레드가 영원히 막히지 않도록 주기적으로 종료 여부 확인
+        while not self._stop.is_set():
+            try:
+                frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read(self):
+        """동기화된 (left, right) 프레임 쌍을 반환함. 스트림이 끝나면 (False, None, None)"""
+        if self._finished:
+            return False, None, None
+
+        frame_left = self._queues[0].get()
+        frame_right = self._queues[1].get()
+        if frame_left is _END_OF_STREAM or frame_right is _END_OF_STREAM:
+            if frame_left is _END_OF_STREAM:
+                print("Warning: Left stream ended.")
+            if frame_right is _END_OF_STREAM:
+                print("Warning: Right stream ended.")
+            self._finished = True
+            if self._error is not None:
+                raise self._error
+            return False, None, None
+
+        return True, frame_left, frame_right
+
+    def __iter__(self):
+        while True:
+            ret, frame_left, frame_right = self.read()
+            if not ret:
+                return
+            yield frame_left, frame_right
+
+    def release(self):
+        """디코딩 스레드를 멈추고 비디오 캡처를 해제함"""
+        self._stop.set()
+        for frames in self._queues:
+            # 대기 중인 put이 빠져나올 수 있도록 버퍼 비우기
+            while True:
+                try:
+                    frames.get_nowait()
+                except queue.Empty:
+                    break
+        for thread in self._threads:
+            thread.join()
+        self.cap_left.release()
+        self.cap_right.release()
@@ -0,0 +1,119 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from utils import ensure_output_folder
+
+IMAGE_FORMATS = ('png', 'jpg', 'video', 'none')
+
+
+def normalize_disparity(disparity):
+    return cv2.normalize(disparity, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+class _BoundedExecutor:
+    """대기 작업 수를 제한하는 ThreadPoolExecutor (가득 차면 submit이 대기함)"""
+
+    def __init__(self, workers, max_pending):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._error = None
+
+    def submit(self, fn, *args):
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._slots.release()
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        if self._error is not None:
+            raise self._error
+
+
+class ImageSequenceWriter:
+    """프레임마다 left/right/disparity 이미지를 워커 풀에서 병렬 인코딩해 저장함"""
+
+    def __init__(self, output_folder, image_format='png', png_compression=3, jpeg_quality=95, workers=4):
+        if image_format not in ('png', 'jpg'):
+            raise ValueError(f"Unsupported image format: {image_format}")
+        ensure_output_folder(output_folder)
+        self.output_folder = output_folder
+        self.extension = image_format
+        if image_format == 'png':
+            self.params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        else:
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        # cv2.imwrite는 인코딩 중 GIL을 해제하므로 스레드 풀로도 여러 코어를 사용함
+        self._executor = _BoundedExecutor(workers, max_pending=4 * workers)
+
+    def write(self, frame_idx, left_img, right_img, disparity):
+        for name, image in (('left', left_img), ('right', right_img), ('disparity', disparity)):
+            if image is not None:
+                self._executor.submit(self._encode, name, frame_idx, image)
+
+    def _encode(self, name, frame_idx, image):
+        if name == 'disparity':
+            image = normalize_disparity(image)
+        path = os.path.join(self.output_folder, f"{name}_{frame_idx}.{self.extension}")
+        if not cv2.imwrite(path, image, self.params):
+            raise IOError(f"Could not write {path}")
+
+    def close(self):
+        self._executor.shutdown()
+
+
+class VideoStreamWriter:
+    """left/right/disparity 스트림을 각각의 비디오 파일로 저장함 (스트림마다 전용 인코딩 스레드)"""
+
+    def __init__(self, output_folder, fps=30.0, fourcc='mp4v', extension='mp4'):
+        ensure_output_folder(output_folder)
+        self.output_folder = output_folder
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.extension = extension
+        self._writers = {}
+        # 프레임 순서를 지키기 위해 스트림마다 워커 1개
+        self._executors = {name: _BoundedExecutor(1, max_pending=8) for name in ('left', 'right', 'disparity')}
+
+    def write(self, frame_idx, left_img, right_img, disparity):
+        for name, image in (('left', left_img), ('right', right_img), ('disparity', disparity)):
+            if image is not None:
+                self._executors[name].submit(self._encode, name, image)
+
+    def _encode(self, name, image):
+        if name == 'disparity':
+            image = cv2.cvtColor(normalize_disparity(image), cv2.COLOR_GRAY2BGR)
+        writer = self._writers.get(name)
+        if writer is None:
+            height, width = image.shape[:2]
+            path = os.path.join(self.output_folder, f"{name}.{self.extension}")
+            writer = cv2.VideoWriter(path, self.fourcc, self.fps, (width, height))
+            if not writer.isOpened():
+                raise IOError(f"Could not open video writer {path}")
+            self._writers[name] = writer
+        writer.write(image)
+
+    def close(self):
+        try:
+            for executor in self._executors.values():
+                executor.shutdown()
+        finally:
+            for writer in self._writers.values():
+                writer.release()
+
+
+def create_frame_writer(output_folder, image_format='png', png_compression=3, workers=4, fps=30.0):
+    """저장 방식에 맞는 프레임 writer를 생성함 ('none'이면 None)"""
+    if image_format == 'none':
+        return None
+    if image_format == 'video':
+        return VideoStreamWriter(output_folder, fps=fps)
+    return ImageSequenceWriter(output_folder, image_format, png_compression, workers=workers)
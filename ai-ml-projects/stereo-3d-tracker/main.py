@@ -1,58 +1,234 @@
+import argparse
 import cv2
 import time
 import pandas as pd
 import os
 import numpy as np
+from collections import deque
 from sync import synchronize_videos
+from calibration import StereoCalibration, create_rectifier
+from frame_cache import CACHE_FOLDER, FrameCache, CachedFrameSource, cache_key, file_digest
+from frame_source import StereoFrameSource
+from disparity import DisparityEngine, IncrementalDisparity, BACKENDS
+from recorder import TrackingRecorder
+from frame_writer import IMAGE_FORMATS
 from feature_matching import get_initial_points
-from tracking import initialize_tracker, track_object, update_tracker
-from utils import equalize_histogram, resize_to_match, ensure_output_folder, save_to_csv, save_to_text_file
+from tracking import TRACKER_BACKENDS, initialize_trackers, update_tracker, update_trackers, compute_depths, point_bbox
+from preview import PreviewRenderer
+from reacquire import TargetReacquirer
+from telemetry import PipelineTelemetry, NullTelemetry
+from scheduler import AdaptiveScheduler
+from parallel_disparity import SharedDisparityPool
+from utils import equalize_histogram, resize_to_match
 
 OUTPUT_FOLDER = 'output'
+LEFT_VIDEO = 'target/3_LEFT.mp4'
+RIGHT_VIDEO = 'target/3_RIGHT.mp4'
+TELEMETRY_PATH = os.path.join(OUTPUT_FOLDER, 'telemetry.npz')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='스테레오 비전 기반 3D 객체 추적')
+    parser.add_argument('--disparity-backend', choices=BACKENDS, default='bm',
+                        help='disparity 매처 (bm: 빠름, sgbm: 정확, pyramid: 1/2 해상도 매칭 후 정제)')
+    parser.add_argument('--num-disparities', type=int, default=64,
+                        help='disparity 탐색 범위 (16의 배수, 기본값: 64)')
+    parser.add_argument('--block-size', type=int, default=15,
+                        help='매칭 블록 크기 (홀수, 기본값: 15)')
+    parser.add_argument('--incremental-disparity', action='store_true',
+                        help='직전 disparity를 유지하고 프레임 차이로 움직임이 생긴 타일만 다시 계산 (정적인 카메라용)')
+    parser.add_argument('--refresh-interval', type=int, default=30,
+                        help='증분 모드에서 전체 disparity를 다시 계산하는 프레임 간격 (기본값: 30)')
+    parser.add_argument('--disparity-workers', type=int, default=0,
+                        help='전체 프레임 disparity를 계산할 워커 프로세스 수. 주면 공유 메모리 링으로 프레임을 넘기고 '
+                             '다음 프레임 추적과 겹쳐 실행 (기본값: 0, 끔)')
+    parser.add_argument('--cache', action='store_true',
+                        help='정렬된 프레임/평활화 그레이/disparity를 디스크 캐시에 저장하고, 같은 비디오와 설정으로 '
+                             '다시 실행하면 디코딩과 스테레오 매칭 없이 캐시에서 읽음')
+    parser.add_argument('--cache-dir', default=CACHE_FOLDER, help=f'캐시 폴더 (기본값: {CACHE_FOLDER})')
+    parser.add_argument('--cache-size-gb', type=float, default=20.0,
+                        help='캐시 최대 크기 GB, 넘으면 오래 쓰지 않은 항목부터 삭제 (기본값: 20)')
+    parser.add_argument('--calibration',
+                        help='스테레오 캘리브레이션 파일 (npz 또는 OpenCV yml/xml). 주면 프레임을 정렬하고 Q 행렬로 깊이 계산')
+    parser.add_argument('--tracker', choices=TRACKER_BACKENDS, default='csrt',
+                        help='추적기 백엔드 (csrt: 정확, kcf/mosse: 빠름, lk: 단일 점 광류)')
+    parser.add_argument('--roi-disparity', action='store_true',
+                        help='추적 bbox 주변 띠 영역에서만 disparity 계산 (추적 실패 시 전체 프레임)')
+    parser.add_argument('--roi-margin', type=int, default=20,
+                        help='프레임 간 이동을 고려한 ROI 여유 픽셀 (기본값: 20)')
+    parser.add_argument('--multi-target', action='store_true',
+                        help='첫 프레임에서 여러 대상을 클릭해 동시에 추적 (disparity는 프레임당 한 번만 계산)')
+    parser.add_argument('--no-reacquire', action='store_true',
+                        help='추적 실패 시 마지막 위치 주변에서 대상을 다시 찾는 기능 끄기')
+    parser.add_argument('--preview-rate', type=float, default=5.0,
+                        help='미리보기 갱신 주기 Hz (기본값: 5, 0이면 미리보기 끔)')
+    parser.add_argument('--target-fps', type=float, default=0.0,
+                        help='목표 처리 속도. 주면 처리 시간이 부족할 때 disparity 재사용, 1/2 해상도, '
+                             '프레임 건너뛰기 순으로 품질을 낮추고 여유가 생기면 복구 (기본값: 0, 끔)')
+    parser.add_argument('--no-telemetry', action='store_true',
+                        help=f'단계별 소요 시간/메모리 기록 끄기 (기본: {TELEMETRY_PATH}에 저장)')
+    parser.add_argument('--image-format', choices=IMAGE_FORMATS, default='png',
+                        help='프레임 이미지 저장 방식 (png/jpg: 이미지 파일, video: 스트림별 비디오, none: 저장 안 함)')
+    parser.add_argument('--png-compression', type=int, default=3,
+                        help='PNG 압축 수준 0-9 (기본값: 3)')
+    parser.add_argument('--encode-workers', type=int, default=4,
+                        help='이미지 인코딩 워커 수 (기본값: 4)')
+    args = parser.parse_args()
+    if args.disparity_workers > 0 and (args.roi_disparity or args.incremental_disparity or args.target_fps > 0):
+        parser.error('--disparity-workers computes full-frame disparity only; '
+                     'it cannot be combined with --roi-disparity, --incremental-disparity or --target-fps')
+    return args
 
 def main():
+    args = parse_args()
+
+    opened = open_videos(args, LEFT_VIDEO, RIGHT_VIDEO)
+    if opened is None:
+        return
+    source, left_img, right_img, rectifier, fps, cache_writer = opened
+
+    # 포인트 선택
+    if args.multi_target:
+        points = select_tracking_points(left_img)
+    else:
+        point_left = select_tracking_point(left_img)
+        points = [point_left] if point_left is not None else []
+    if not points:
+        print("No point selected.")
+        if cache_writer is not None:
+            cache_writer.close(complete=False)
+        return
+
+    # 추적기 초기화 (대상마다 하나)
+    trackers = initialize_trackers(left_img, points, args.tracker)
+    print(f"{len(trackers)} tracker(s) initialized successfully.")
+
+    # 재탐색용 템플릿/ORB 특징은 초기 선택 프레임에서 한 번만 계산
+    reacquirers = None if args.no_reacquire else [TargetReacquirer(left_img, point) for point in points]
+
+    # disparity 매처는 세션마다 한 번만 생성
+    engine = DisparityEngine(args.disparity_backend, args.num_disparities, args.block_size)
+    if args.incremental_disparity:
+        engine = IncrementalDisparity(engine, refresh_interval=args.refresh_interval)
+
+    # 데이터 기록 (좌/우 디코딩은 백그라운드 스레드에서 미리 수행, 결과는 프레임마다 바로 저장)
+    recorder = TrackingRecorder(OUTPUT_FOLDER, image_format=args.image_format, png_compression=args.png_compression,
+                                encode_workers=args.encode_workers, fps=fps)
+    Q = rectifier.Q if rectifier is not None else None
+    preview = PreviewRenderer(args.preview_rate, Q=Q) if args.preview_rate > 0 else None
+    telemetry = None if args.no_telemetry else PipelineTelemetry()
+    scheduler = AdaptiveScheduler(args.target_fps) if args.target_fps > 0 else None
+    disparity_pool = None
+    if args.disparity_workers > 0 and not isinstance(source, CachedFrameSource):
+        disparity_pool = SharedDisparityPool(left_img.shape, args.disparity_workers, backend=args.disparity_backend,
+                                             num_disparities=args.num_disparities, block_size=args.block_size)
+    completed = False
+    try:
+        track_objects(source, trackers, points, engine, recorder=recorder,
+                      roi_disparity=args.roi_disparity, roi_margin=args.roi_margin,
+                      reacquirers=reacquirers, tracker_backend=args.tracker, preview=preview,
+                      telemetry=telemetry, rectifier=rectifier, scheduler=scheduler,
+                      disparity_pool=disparity_pool, cache_writer=cache_writer)
+        completed = preview is None or not preview.stop_requested
+    finally:
+        recorder.close()
+        if cache_writer is not None:
+            # 끝까지 처리한 실행만 캐시로 남김
+            cache_writer.close(complete=completed)
+        if disparity_pool is not None:
+            disparity_pool.close()
+        if args.incremental_disparity:
+            print(f"Incremental disparity recomputed {engine.recomputed_ratio():.1%} of tiles "
+                  f"({engine.full_refreshes} full refreshes over {engine.frames} frames)")
+        if preview is not None:
+            preview.close()
+        if telemetry is not None:
+            telemetry.save(TELEMETRY_PATH)
+
+def open_videos(args, left_video_path, right_video_path):
+    """비디오를 열어 동기화하고 첫 프레임을 준비함. --cache 항목이 있으면 디코딩/동기화 없이 캐시에서 읽음
+
+    (source, left_img, right_img, rectifier, fps, cache_writer)를 반환하고, 실패하면 None을 반환함
+    """
+    cache = entry = None
+    if args.cache:
+        cache = FrameCache(args.cache_dir, int(args.cache_size_gb * 2**30))
+        key = cache_key(left_video_path, right_video_path, cache_params(args))
+        entry = cache.open(key, need_right=args.image_format != 'none')
+
+    if entry is not None:
+        print(f"Using {entry.length} cached frames from {entry.path} (decode and stereo matching skipped).")
+        left_img, right_img = entry.frame(0)[:2]
+        rectifier = None
+        if args.calibration:
+            # 캐시된 프레임은 이미 정렬되어 있으므로 깊이 계산용 Q 행렬만 다시 만듦
+            rectifier = StereoCalibration.load(args.calibration).build_rectifier(*entry.info['input_sizes'])
+        return CachedFrameSource(entry), left_img, right_img, rectifier, entry.info.get('fps', 30.0), None
+
     # 비디오 파일 로드 및 확인
-    cap_left, cap_right = load_videos('target/3_LEFT.mp4', 'target/3_RIGHT.mp4')
+    cap_left, cap_right = load_videos(left_video_path, right_video_path)
 
     if not cap_left or not cap_right:
-        return
+        return None
 
-    # 비디오 동기화
+    # 비디오 동기화 (앞선 스트림을 지연 프레임만큼 건너뜀)
     cap_left, cap_right, lag = synchronize_videos(cap_left, cap_right)
-    print(f"Videos synchronized with lag: {lag}")
+    if cap_left is None:
+        print("Error: Could not read frames for synchronization.")
+        return None
+    print(f"Videos synchronized with lag: {lag:.2f} frames")
 
     # 첫 번째 프레임 가져오기
     ret_left, left_img = cap_left.read()
     ret_right, right_img = cap_right.read()
     if not ret_left or not ret_right:
         print("Error: Could not read initial frames.")
-        return
+        return None
+    input_sizes = [left_img.shape[1::-1], right_img.shape[1::-1]]
 
-    # 포인트 선택
-    point_left = select_tracking_point(left_img)
-    if point_left is None:
-        print("No point selected.")
-        return
+    # 정렬 조회 테이블은 첫 프레임 해상도 기준으로 한 번만 계산 (대상 선택도 정렬된 프레임에서)
+    rectifier = None
+    if args.calibration:
+        rectifier = create_rectifier(args.calibration, left_img, right_img)
+        print(f"Calibration loaded from {args.calibration}.")
+    left_img, right_img = prepare_frames(left_img, right_img, rectifier)
 
-    # 추적기 초기화
-    tracker = initialize_tracker(left_img, point_left)
-    print("Tracker initialized successfully.")
+    fps = cap_left.get(cv2.CAP_PROP_FPS) or 30.0
+    cache_writer = None
+    if cache is not None:
+        if args.roi_disparity or args.incremental_disparity or args.target_fps > 0 or args.disparity_workers > 0:
+            print("Frame cache not written: only full-frame single-process runs are cached.")
+        else:
+            # 오른쪽 BGR 프레임은 이미지 저장에만 필요함. 남은 프레임 수로 캐시 크기를 미리 검사
+            remaining = int(cap_left.get(cv2.CAP_PROP_FRAME_COUNT) - cap_left.get(cv2.CAP_PROP_POS_FRAMES)) + 1
+            cache_writer = cache.writer(key, info={'fps': fps, 'lag': lag, 'input_sizes': input_sizes},
+                                        include_right=args.image_format != 'none',
+                                        expected_frames=remaining if remaining > 1 else None)
+            left_gray, right_gray = equalize_histogram(left_img), equalize_histogram(right_img)
+            engine = DisparityEngine(args.disparity_backend, args.num_disparities, args.block_size)
+            cache_writer.append(left_img, right_img, left_gray, right_gray, engine.compute(left_gray, right_gray))
 
-    # 데이터 기록
-    tracking_data = track_objects(cap_left, cap_right, tracker, point_left)
+    return StereoFrameSource(cap_left, cap_right), left_img, right_img, rectifier, fps, cache_writer
 
-    # 결과 저장
-    save_tracking_results(tracking_data)
+def cache_params(args):
+    """캐시된 프레임과 disparity에 영향을 주는 설정"""
+    return {
+        'disparity_backend': args.disparity_backend,
+        'num_disparities': args.num_disparities,
+        'block_size': args.block_size,
+        'calibration': file_digest(args.calibration) if args.calibration else None,
+    }
 
 def load_videos(left_video_path, right_video_path):
     cap_left = cv2.VideoCapture(left_video_path)
     cap_right = cv2.VideoCapture(right_video_path)
 
-    if not cap_left.isOpened():
-        print(f"Error: Could not open left video file {left_video_path}.")
-        return None, None
-    if not cap_right.isOpened():
-        print(f"Error: Could not open right video file {right_video_path}.")
+    if not cap_left.isOpened() or not cap_right.isOpened():
+        if not cap_left.isOpened():
+            print(f"Error: Could not open left video file {left_video_path}.")
+        else:
+            print(f"Error: Could not open right video file {right_video_path}.")
+        cap_left.release()
+        cap_right.release()
         return None, None
 
     print("Videos loaded successfully.")
@@ -75,106 +251,237 @@ def select_tracking_point(image):
     
     return selected_point[0]
 
-def track_objects(cap_left, cap_right, tracker, point_left):
-    """객체 추적을 수행하고 데이터를 반환함"""
-    tracking_data = []
-    frame_idx = 0
+def select_tracking_points(image):
+    """이미지에서 추적할 포인트를 여러 개 선택함 (클릭마다 추가, 'Enter'로 종료)"""
+    selected_points = []
     
-    while cap_left.isOpened() and cap_right.isOpened():
-        ret_left, frame_left = cap_left.read()
-        ret_right, frame_right = cap_right.read()
+    def mouse_callback(event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            selected_points.append((x, y))
+            print(f"Point {len(selected_points) - 1} selected: {(x, y)}")
+    
+    cv2.imshow('Select Objects', image)
+    cv2.setMouseCallback('Select Objects', mouse_callback)
+    print("Click on each object to track and press 'Enter' or close the window.")
+    cv2.waitKey(0)
+    cv2.destroyAllWindows()
+    
+    return selected_points
 
-        if not ret_left or frame_left is None:
-            print("Warning: Left frame is empty.")
-            break
-        if not ret_right or frame_right is None:
-            print("Warning: Right frame is empty.")
-            break
+def track_objects(source, trackers, points, engine=None, recorder=None, roi_disparity=False, roi_margin=20,
+                  reacquirers=None, tracker_backend='csrt', preview=None, telemetry=None, verbose=True,
+                  rectifier=None, scheduler=None, disparity_pool=None, cache_writer=None):
+    """객체 추적을 수행하고 스칼라 추적 데이터(구조화 배열)를 반환함
 
-        frame_left, frame_right = resize_to_match(frame_left, frame_right)
-        frame_left_gray = equalize_histogram(frame_left)
-        frame_right_gray = equalize_histogram(frame_right)
+    trackers/points는 대상마다 하나씩이며, disparity는 프레임당 한 번만 계산해 모든 대상이 공유함.
+    reacquirers가 주어지면 놓친 대상을 마지막 위치 주변에서 다시 찾아 추적기를 재설정함.
+    preview가 None이면 시각화 작업을 전혀 하지 않음 (헤드리스 실행).
+    telemetry(PipelineTelemetry)가 주어지면 단계별 소요 시간을 프레임마다 기록함.
+    rectifier(calibration.StereoRectifier)가 주어지면 정렬과 크기 맞춤을 remap 한 번으로 처리하고
+    깊이는 그 Q 행렬로 계산함 (없으면 기본 B, f 값 사용).
+    scheduler(AdaptiveScheduler)가 주어지면 프레임 처리 비용에 따라 disparity 재사용/저해상도 계산/
+    프레임 건너뛰기로 목표 프레임 시간을 유지함.
+    disparity_pool(SharedDisparityPool)이 주어지면 워커 프로세스가 앞선 프레임들의 전체 disparity를 계산하는 동안
+    다음 프레임의 추적을 진행함 (engine, roi_disparity, scheduler는 사용하지 않음).
+    source가 CachedFrameSource이면 정렬/평활화/disparity 계산 없이 캐시된 결과를 그대로 쓰고,
+    cache_writer(CacheWriter)가 주어지면 전체 프레임 disparity를 계산한 프레임마다 캐시에 이어 씀
+    """
+    if recorder is None:
+        recorder = TrackingRecorder(None)  # 파일 저장 없이 스칼라 값만 유지
+    if telemetry is None:
+        telemetry = NullTelemetry()
+    if cache_writer is not None and (roi_disparity or scheduler is not None or disparity_pool is not None):
+        raise ValueError("cache_writer caches full-frame disparity from the sequential loop only.")
+    if disparity_pool is not None:
+        if roi_disparity or scheduler is not None:
+            raise ValueError("disparity_pool computes full-frame disparity only; "
+                             "roi_disparity and scheduler are not supported with it.")
+        return _track_pipelined(source, trackers, points, disparity_pool, recorder, reacquirers, tracker_backend,
+                                preview, telemetry, verbose, rectifier)
+    if engine is None:
+        engine = DisparityEngine()
+    Q = rectifier.Q if rectifier is not None else None
+    targets = np.arange(len(trackers))
+    last_xs = np.array([int(point[0]) for point in points], dtype=np.int32)
+    last_ys = np.array([int(point[1]) for point in points], dtype=np.int32)
+    frame_idx = 0
+    disparity = None
+    cached = isinstance(source, CachedFrameSource)
+    
+    while True:
+        telemetry.start_frame(frame_idx)
+        ret, frame_left, frame_right = source.read()
+        if not ret:
+            break
+        telemetry.lap('decode')
+        if scheduler is not None:
+            if scheduler.should_drop(frame_idx):
+                telemetry.end_frame()
+                frame_idx += 1
+                continue
+            scheduler.start_frame()
+        # disparity를 재사용하는 프레임에서는 그레이스케일 변환과 매칭을 모두 생략함
+        reuse_disparity = (not cached and disparity is not None and scheduler is not None
+                           and scheduler.reuse_disparity())
 
-        # 깊이 맵 생성
-        disparity = compute_disparity(frame_left_gray, frame_right_gray)
-        depth_map = compute_depth_map(disparity)
+        if cached:
+            frame_left_gray, frame_right_gray, cached_disparity = source.products()
+        else:
+            frame_left, frame_right = prepare_frames(frame_left, frame_right, rectifier)
+        telemetry.lap('resize')
+        if not reuse_disparity and not cached:
+            frame_left_gray = equalize_histogram(frame_left)
+            frame_right_gray = equalize_histogram(frame_right)
+        telemetry.lap('equalize')
 
-        cv2.imshow('Disparity', (disparity - disparity.min()) / (disparity.max() - disparity.min()))
-        cv2.imshow('Depth Map', (depth_map - depth_map.min()) / (depth_map.max() - depth_map.min()))
+        timestamp, successes, xs, ys, confidences = update_targets(
+            trackers, frame_left, last_xs, last_ys, reacquirers, tracker_backend, verbose)
+        telemetry.lap('tracker')
 
-        success, timestamp, x, y, depth = track_object(tracker, frame_left, frame_left_gray, disparity, point_left)
-        if success:
-            tracking_data.append([timestamp, x, y, depth, frame_left, frame_right, disparity])
-            print(f"Tracked point at time {timestamp}: ({x}, {y}, Depth: {depth})")
+        # 깊이 맵 생성 (ROI 모드: 추적 중인 대상 주변만, 모두 놓쳤을 때만 전체 프레임)
+        if reuse_disparity:
+            pass
+        elif cached:
+            disparity = cached_disparity
+        elif roi_disparity and successes.any():
+            bboxes = [point_bbox(point) for point in zip(xs[successes], ys[successes])]
+            disparity = engine.compute_roi(frame_left_gray, frame_right_gray, bboxes, roi_margin)
+        elif scheduler is not None and scheduler.coarse_disparity():
+            disparity = engine.compute_coarse(frame_left_gray, frame_right_gray)
         else:
-            print(f"Object lost at time {timestamp}. Click on the object to reselect or press 'Enter' to skip.")
-            # 추적 실패 시 재선택 로직 (간소화)
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                break
-
-        cv2.imshow('Left Video', frame_left)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+            disparity = engine.compute(frame_left_gray, frame_right_gray)
+            if cache_writer is not None:
+                cache_writer.append(frame_left, frame_right, frame_left_gray, frame_right_gray, disparity)
+        telemetry.lap('disparity')
+
+        record_frame(recorder, frame_idx, timestamp, targets, successes, xs, ys, confidences,
+                     frame_left, frame_right, disparity, Q, telemetry, verbose)
+
+        # 미리보기 이미지는 별도 스레드가 정해진 주기로 최신 스냅샷만 만들고, 표시는 이 스레드에서 함
+        if preview is not None:
+            preview.submit(frame_left, disparity, list(zip(xs[successes], ys[successes])))
+            preview.show()
+        telemetry.lap('display')
+        telemetry.end_frame()
+        if scheduler is not None:
+            scheduler.end_frame(frame_idx)
+        if preview is not None and preview.stop_requested:
             break
 
         frame_idx += 1
 
-    cap_left.release()
-    cap_right.release()
-    cv2.destroyAllWindows()
+    source.release()
     
-    return tracking_data
+    return recorder.track
 
-def save_tracking_results(tracking_data):
-    """추적 결과를 파일로 저장함"""
-    if not tracking_data:
-        print("No tracking data to save.")
-        return
-    
-    # 출력 폴더 생성
-    ensure_output_folder(OUTPUT_FOLDER)
-    
-    # CSV 및 텍스트 파일로 저장
-    csv_path = os.path.join(OUTPUT_FOLDER, 'tracked_coordinates.csv')
-    txt_path = os.path.join(OUTPUT_FOLDER, 'tracked_coordinates.txt')
-    save_to_csv(tracking_data, csv_path)
-    save_to_text_file(tracking_data, txt_path)
-    
-    # 결과 이미지 저장
-    result_folder = os.path.splitext(txt_path)[0]
-    ensure_output_folder(result_folder)
-    
-    for idx, frame_data in enumerate(tracking_data):
-        save_stereo_images(frame_data[4], frame_data[5], frame_data[6], result_folder, idx)
-
-def compute_disparity(left_gray, right_gray):
-    num_disparities = 64  # 16의 배수로 설정
-    block_size = 15       # 블록 크기 설정
-    stereo = cv2.StereoBM_create(numDisparities=num_disparities, blockSize=block_size)
-    stereo.setPreFilterType(cv2.STEREO_BM_PREFILTER_XSOBEL)
-    stereo.setPreFilterSize(9)
-    stereo.setPreFilterCap(31)
-    stereo.setMinDisparity(0)
-    stereo.setTextureThreshold(10)
-    stereo.setUniquenessRatio(15)
-    stereo.setSpeckleRange(32)
-    stereo.setSpeckleWindowSize(100)
-    disparity = stereo.compute(left_gray, right_gray).astype(np.float32) / 16.0
-    return disparity
-
-def compute_depth_map(disparity):
-    B = 0.1  # meter
-    f = 0.02  # meter
-    depth_map = (B * f) / (disparity + 1e-6)  # Add small value to avoid division by zero
-    depth_map[disparity <= 0] = 0  # Set depth to 0 where disparity is invalid
-    return depth_map
-
-def save_stereo_images(left_img, right_img, disparity, output_folder, frame_idx):
-    ensure_output_folder(output_folder)
-    cv2.imwrite(os.path.join(output_folder, f"left_{frame_idx}.png"), left_img)
-    cv2.imwrite(os.path.join(output_folder, f"right_{frame_idx}.png"), right_img)
-    disparity_normalized = cv2.normalize(disparity, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
-    cv2.imwrite(os.path.join(output_folder, f"disparity_{frame_idx}.png"), disparity_normalized)
+def _track_pipelined(source, trackers, points, pool, recorder, reacquirers, tracker_backend, preview, telemetry,
+                     verbose, rectifier):
+    """파이프라인 병렬 모드: 그레이스케일 쌍은 공유 메모리 링으로 보내고, 결과는 제출 순서대로 받아 기록함
+
+    링이 가득 차면 가장 오래된 프레임의 disparity를 받아 깊이 계산/저장/미리보기를 마무리한 뒤 다음 프레임을 제출함
+    """
+    Q = rectifier.Q if rectifier is not None else None
+    targets = np.arange(len(trackers))
+    last_xs = np.array([int(point[0]) for point in points], dtype=np.int32)
+    last_ys = np.array([int(point[1]) for point in points], dtype=np.int32)
+    in_flight = deque()
+
+    def finish_oldest(telemetry):
+        frame_idx, frame_left, frame_right, timestamp, successes, xs, ys, confidences = in_flight.popleft()
+        disparity = pool.get()
+        telemetry.lap('disparity')
+        record_frame(recorder, frame_idx, timestamp, targets, successes, xs, ys, confidences,
+                     frame_left, frame_right, disparity, Q, telemetry, verbose)
+        if preview is not None:
+            preview.submit(frame_left, disparity, list(zip(xs[successes], ys[successes])))
+            preview.show()
+        telemetry.lap('display')
+
+    frame_idx = 0
+    while True:
+        telemetry.start_frame(frame_idx)
+        ret, frame_left, frame_right = source.read()
+        if not ret:
+            break
+        telemetry.lap('decode')
+
+        frame_left, frame_right = prepare_frames(frame_left, frame_right, rectifier)
+        telemetry.lap('resize')
+        pool.submit(equalize_histogram(frame_left), equalize_histogram(frame_right))
+        telemetry.lap('equalize')
+
+        # 워커가 disparity를 계산하는 동안 이 프레임의 추적을 진행
+        in_flight.append((frame_idx, frame_left, frame_right) + update_targets(
+            trackers, frame_left, last_xs, last_ys, reacquirers, tracker_backend, verbose))
+        telemetry.lap('tracker')
+
+        if pool.pending == pool.slots:
+            finish_oldest(telemetry)
+        telemetry.end_frame()
+        if preview is not None and preview.stop_requested:
+            break
+
+        frame_idx += 1
+
+    while in_flight:
+        finish_oldest(NullTelemetry())
+    source.release()
+
+    return recorder.track
+
+def prepare_frames(frame_left, frame_right, rectifier=None):
+    """캘리브레이션이 있으면 정렬+크기 맞춤을 remap 한 번으로, 없으면 오른쪽 프레임 크기만 맞춤"""
+    if rectifier is not None:
+        return rectifier.rectify(frame_left, frame_right)
+    return resize_to_match(frame_left, frame_right)
+
+def update_targets(trackers, frame_left, last_xs, last_ys, reacquirers=None, tracker_backend='csrt', verbose=True):
+    """모든 추적기를 갱신하고 놓친 대상은 재탐색함. (timestamp, successes, xs, ys, confidences)를 반환함
+
+    last_xs/last_ys는 대상별 마지막 성공 위치이며 이 함수 안에서 갱신됨
+    """
+    successes, xs, ys = update_trackers(trackers, frame_left)
+    timestamp = time.time()
+    confidences = np.ones(len(trackers), dtype=np.float32)
+
+    if reacquirers is not None:
+        for i in np.flatnonzero(successes):
+            reacquirers[i].reset()
+        for i in np.flatnonzero(~successes):
+            found = reacquirers[i].search(frame_left, (last_xs[i], last_ys[i]))
+            if found is None:
+                continue
+            (xs[i], ys[i]), confidences[i] = found
+            trackers[i] = update_tracker(frame_left, (xs[i], ys[i]), tracker_backend)
+            successes[i] = True
+            if verbose:
+                print(f"Object {i} re-acquired at ({xs[i]}, {ys[i]}) with score {confidences[i]:.2f}")
+    last_xs[successes], last_ys[successes] = xs[successes], ys[successes]
+    return timestamp, successes, xs, ys, confidences
+
+def record_frame(recorder, frame_idx, timestamp, targets, successes, xs, ys, confidences,
+                 frame_left, frame_right, disparity, Q, telemetry, verbose=True):
+    """추적에 성공한 대상의 깊이를 계산해 기록하고, 놓친 대상을 알림"""
+    # 대상을 모두 놓친 프레임에서도 depth/save 구간을 기록해야 그 시간이 display 단계로 넘어가지 않음
+    if successes.any():
+        depths = compute_depths(disparity, xs[successes], ys[successes], Q)
+    telemetry.lap('depth')
+    if successes.any():
+        recorder.record_targets(frame_idx, timestamp, targets[successes], xs[successes], ys[successes], depths,
+                                confidences[successes], frame_left=frame_left, frame_right=frame_right, disparity=disparity)
+        if verbose:
+            for target, x, y, depth in zip(targets[successes], xs[successes], ys[successes], depths):
+                print(f"Tracked point {target} at time {timestamp}: ({x}, {y}, Depth: {depth})")
+    telemetry.lap('save')
+    if verbose and not successes.all():
+        lost = ', '.join(str(target) for target in targets[~successes])
+        print(f"Object {lost} lost at time {timestamp}.")
+
+def compute_disparity(left_gray, right_gray, engine=None):
+    """단발성 disparity 계산 (반복 호출 시에는 DisparityEngine을 직접 재사용할 것)"""
+    if engine is None:
+        engine = DisparityEngine()
+    return engine.compute(left_gray, right_gray)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import multiprocessing as mp
+import queue
+import traceback
+from collections import deque
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from disparity import DisparityEngine
+
+
+class SharedDisparityPool:
+    """그레이스케일 좌/우 쌍을 공유 메모리 링 슬롯에 쓰고, 워커 프로세스들이 disparity를 같은 번호의
+    공유 출력 슬롯에 계산하는 프로세스 풀
+
+    큐로는 슬롯 번호만 주고받으므로 프레임을 pickle하지 않음. submit() 순서대로 get()이 결과를 돌려줌.
+    워커마다 DisparityEngine을 하나씩 가지며 전체 프레임 disparity만 계산함.
+    디코딩/미리보기 스레드가 이미 돌고 있을 때 fork하면 다른 스레드가 잡고 있던 OpenCV/FFmpeg 락이
+    자식에 잠긴 채 복사될 수 있으므로 기본 시작 방식은 spawn임
+    """
+
+    def __init__(self, shape, workers=4, slots=None, backend='bm', num_disparities=64, block_size=15,
+                 opencv_threads=1, start_method='spawn'):
+        height, width = shape[:2]
+        self.shape = (height, width)
+        self.slots = slots or 2 * workers
+        self._input_memory = shared_memory.SharedMemory(create=True, size=self.slots * 2 * height * width)
+        self._output_memory = shared_memory.SharedMemory(create=True, size=self.slots * height * width * 4)
+        self._inputs = np.ndarray((self.slots, 2, height, width), dtype=np.uint8, buffer=self._input_memory.buf)
+        self._outputs = np.ndarray((self.slots, height, width), dtype=np.float32, buffer=self._output_memory.buf)
+
+        context = mp.get_context(start_method)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._free = deque(range(self.slots))
+        self._slot_of = {}
+        self._finished = {}
+        self._next_submit = 0
+        self._next_result = 0
+        self._workers = [
+            context.Process(target=_worker_loop, daemon=True,
+                       args=(self._input_memory.name, self._output_memory.name, self.slots, self.shape,
+                             (backend, num_disparities, block_size), opencv_threads, self._tasks, self._results))
+            for _ in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def pending(self):
+        """제출했지만 아직 get()으로 받지 않은 프레임 수"""
+        return self._next_submit - self._next_result
+
+    def submit(self, left_gray, right_gray):
+        """빈 슬롯에 그레이스케일 쌍을 복사하고 계산을 요청함 (빈 슬롯이 없으면 먼저 get()을 호출해야 함)"""
+        if not self._free:
+            raise RuntimeError("No free slot in the disparity ring; call get() first.")
+        slot = self._free.popleft()
+        self._inputs[slot, 0] = left_gray
+        self._inputs[slot, 1] = right_gray
+        sequence = self._next_submit
+        self._slot_of[sequence] = slot
+        self._next_submit += 1
+        self._tasks.put(slot)
+        return sequence
+
+    def get(self):
+        """가장 먼저 제출한 프레임의 disparity를 기다렸다가 복사본으로 반환하고 슬롯을 비움"""
+        if self.pending == 0:
+            raise RuntimeError("No disparity pending.")
+        slot = self._slot_of.pop(self._next_result)
+        while slot not in self._finished:
+            try:
+                finished, error = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    raise RuntimeError("A disparity worker exited unexpectedly.")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Disparity worker failed:\n{error}")
+            self._finished[finished] = True
+        del self._finished[slot]
+        disparity = self._outputs[slot].copy()
+        self._free.append(slot)
+        self._next_result += 1
+        return disparity
+
+    def close(self):
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+            if worker.is_alive():
+                worker.terminate()
+        # 공유 메모리를 가리키는 배열을 먼저 놓아야 닫을 수 있음
+        self._inputs = self._outputs = None
+        for memory in (self._input_memory, self._output_memory):
+            memory.close()
+            memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _worker_loop(input_name, output_name, slots, shape, engine_args, opencv_threads, tasks, results):
+    """슬롯 번호를 받아 공유 입력 슬롯에서 disparity를 계산해 공유 출력 슬롯에 씀"""
+    cv2.setNumThreads(opencv_threads)
+    height, width = shape
+    input_memory = shared_memory.SharedMemory(name=input_name)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((slots, 2, height, width), dtype=np.uint8, buffer=input_memory.buf)
+    outputs = np.ndarray((slots, height, width), dtype=np.float32, buffer=output_memory.buf)
+    engine = DisparityEngine(*engine_args)
+    try:
+        while True:
+            slot = tasks.get()
+            if slot is None:
+                break
+            try:
+                outputs[slot] = engine.compute(inputs[slot, 0], inputs[slot, 1])
+                results.put((slot, None))
+            except Exception:
+                results.put((slot, traceback.format_exc()))
+    finally:
+        del inputs, outputs
+        input_memory.close()
+        output_memory.close()
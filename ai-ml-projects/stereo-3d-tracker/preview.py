@@ -0,0 +1,74 @@
+import threading
+import time
+import cv2
+from tracking import compute_depth_map
+
+
+class PreviewRenderer:
+    """추적 루프와 별도 스레드에서 최신 프레임만 정해진 주기로 미리보기 이미지를 만듦
+
+    루프는 submit()으로 최신 스냅샷 참조만 넘기고, depth map 계산과 정규화는 실제로 미리보기를 그릴 때만
+    이 스레드에서 수행함. OpenCV GUI 호출은 메인 스레드에서만 안전하므로(macOS) 완성된 8비트 이미지의
+    imshow/waitKey는 추적 루프가 show()로 수행함. 'q' 키를 누르면 stop_requested가 True가 됨
+    """
+
+    def __init__(self, rate_hz=5.0, show_depth=True, Q=None):
+        self.interval = 1.0 / rate_hz
+        self.show_depth = show_depth
+        self.Q = Q
+        self.stop_requested = False
+        self._snapshot = None
+        self._images = None
+        self._last_shown = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_left, disparity, points=()):
+        """최신 프레임 스냅샷을 교체함 (복사하지 않음)"""
+        with self._lock:
+            self._snapshot = (frame_left, disparity, points)
+
+    def show(self):
+        """렌더링이 끝난 최신 이미지를 표시하고 키 입력을 확인함 (메인 스레드에서 호출, 미리보기 주기로 제한)"""
+        now = time.perf_counter()
+        if now - self._last_shown < self.interval:
+            return
+        self._last_shown = now
+        with self._lock:
+            images, self._images = self._images, None
+        if images is not None:
+            for name, image in images:
+                cv2.imshow(name, image)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.stop_requested = True
+
+    def _render_loop(self):
+        while not self._closed.is_set():
+            started = time.perf_counter()
+            with self._lock:
+                snapshot, self._snapshot = self._snapshot, None
+            if snapshot is not None:
+                images = self._render(*snapshot)
+                with self._lock:
+                    self._images = images
+            self._closed.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def _render(self, frame_left, disparity, points):
+        images = [('Disparity', cv2.normalize(disparity, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U))]
+        if self.show_depth:
+            depth_map = compute_depth_map(disparity, self.Q)
+            images.append(('Depth Map', cv2.normalize(depth_map, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)))
+        if len(points):
+            frame_left = frame_left.copy()
+            for x, y in points:
+                cv2.circle(frame_left, (int(x), int(y)), 5, (0, 0, 255), 2)
+        images.append(('Left Video', frame_left))
+        return images
+
+    def close(self):
+        """렌더링 스레드를 멈추고 창을 닫음 (메인 스레드에서 호출)"""
+        self._closed.set()
+        self._thread.join()
+        cv2.destroyAllWindows()
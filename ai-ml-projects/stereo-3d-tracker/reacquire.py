@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+from tracking import BBOX_SIZE
+
+
+class TargetReacquirer:
+    """초기 선택 시점의 템플릿과 ORB 특징을 저장해 두고, 추적 실패 시 마지막 위치 주변에서만 대상을 다시 찾음
+
+    실패한 프레임마다 탐색 창을 growth 배만큼 넓히며 max_radius까지만 키우므로
+    전체 프레임 재검출로 파이프라인이 멈추지 않음
+    """
+
+    def __init__(self, frame, point, template_size=2 * BBOX_SIZE,
+                 initial_radius=2 * BBOX_SIZE, max_radius=320, growth=1.5,
+                 min_score=0.6, min_feature_score=0.25, min_matches=6, ratio=0.75):
+        self.initial_radius = initial_radius
+        self.max_radius = max_radius
+        self.growth = growth
+        self.min_score = min_score
+        self.min_feature_score = min_feature_score
+        self.min_matches = min_matches
+        self.ratio = ratio
+        self.radius = initial_radius
+
+        gray = to_gray(frame)
+        x, y = int(point[0]), int(point[1])
+        half = template_size // 2
+        self.template = crop(gray, x - half, y - half, template_size, template_size)[0]
+
+        self.orb = cv2.ORB_create(nfeatures=200, edgeThreshold=15, patchSize=15)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        # ORB는 가장자리 edgeThreshold 안쪽에서만 검출하므로 여유를 두고 검출한 뒤 템플릿 영역의 특징점만 남김
+        margin = half + self.orb.getEdgeThreshold()
+        patch, (px, py) = crop(gray, x - margin, y - margin, 2 * margin, 2 * margin)
+        keypoints, descriptors = self.orb.detectAndCompute(patch, None)
+        # 각 특징점에서 대상 중심까지의 오프셋
+        offsets = np.array([(x - (px + kp.pt[0]), y - (py + kp.pt[1])) for kp in keypoints], dtype=np.float32)
+        if descriptors is None or len(offsets) == 0:
+            self.descriptors, self.offsets = None, offsets
+        else:
+            inside = np.all(np.abs(offsets) <= half, axis=1)
+            self.descriptors, self.offsets = descriptors[inside], offsets[inside]
+
+    def reset(self):
+        """추적이 성공하면 탐색 창 크기를 초기값으로 되돌림"""
+        self.radius = self.initial_radius
+
+    def search(self, frame, last_point):
+        """마지막 위치 주변 창에서 대상을 찾아 (point, score)를 반환함. 실패하면 None 반환 후 창을 넓힘"""
+        x, y = int(last_point[0]), int(last_point[1])
+        r = int(self.radius)
+        # 탐색 창만 그레이스케일로 변환하므로 비용이 프레임 크기가 아니라 창 크기에 비례함
+        window, (wx, wy) = crop(frame, x - r, y - r, 2 * r, 2 * r)
+        self.radius = min(self.max_radius, self.radius * self.growth)
+        if window.size == 0:
+            return None
+        window = to_gray(window)
+
+        found = self._match_template(window)
+        if found is None:
+            found = self._match_features(window)
+        if found is None:
+            return None
+
+        (cx, cy), score = found
+        return (int(wx + cx), int(wy + cy)), score
+
+    def _match_template(self, window):
+        th, tw = self.template.shape[:2]
+        if window.shape[0] < th or window.shape[1] < tw or self.template.size == 0:
+            return None
+        scores = cv2.matchTemplate(window, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (mx, my) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return None
+        return (mx + tw // 2, my + th // 2), float(score)
+
+    def _match_features(self, window):
+        if self.descriptors is None or len(self.descriptors) < 2:
+            return None
+        keypoints, descriptors = self.orb.detectAndCompute(window, None)
+        if descriptors is None or len(descriptors) < 2:
+            return None
+
+        votes = []
+        for pair in self.matcher.knnMatch(self.descriptors, descriptors, k=2):
+            if len(pair) == 2 and pair[0].distance < self.ratio * pair[1].distance:
+                kx, ky = keypoints[pair[0].trainIdx].pt
+                votes.append((kx, ky) + self.offsets[pair[0].queryIdx])
+        if len(votes) < self.min_matches:
+            return None
+
+        # 중심 위치 투표의 중앙값 주변에 모인 비율(저장한 특징점 대비)을 신뢰도로 사용
+        votes = np.array(votes)
+        center = np.median(votes, axis=0)
+        inliers = np.linalg.norm(votes - center, axis=1) < BBOX_SIZE / 2
+        score = float(inliers.sum() / len(self.descriptors))
+        if inliers.sum() < self.min_matches or score < self.min_feature_score:
+            return None
+        return tuple(votes[inliers].mean(axis=0)), score
+
+
+def to_gray(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+
+def crop(image, x, y, w, h):
+    """이미지 경계로 잘린 영역과 그 왼쪽 위 좌표를 반환함"""
+    height, width = image.shape[:2]
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    return image[y0:max(y0, y1), x0:max(x0, x1)], (x0, y0)
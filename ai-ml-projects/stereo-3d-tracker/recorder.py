@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import numpy as np
+from frame_writer import create_frame_writer
+from track_store import TRACK_DTYPE, TrackStore, load_track
+from utils import ensure_output_folder, unique_path, save_to_csv, save_to_text_file
+
+_STOP = object()
+
+
+class TrackingRecorder:
+    """추적 결과를 프레임이 도착하는 즉시 디스크에 기록하는 스트리밍 저장기
+
+    컬럼형 저장소(TrackStore) 쓰기는 고정 크기 큐를 가진 백그라운드 스레드에서, 이미지 인코딩은
+    frame_writer의 워커 풀(또는 비디오 스트림)에서 수행하고, 메모리에는 미리 할당한
+    구조화 배열(TRACK_DTYPE)만 유지함. CSV/TXT는 종료 시 저장소의 스칼라 컬럼에서 내보냄
+    """
+
+    def __init__(self, output_folder, capacity=4096, queue_size=32, chunk_size=256,
+                 image_format='png', png_compression=3, encode_workers=4, fps=30.0):
+        self.output_folder = output_folder
+        self.frame_writer = None
+        self._track = np.zeros(capacity, dtype=TRACK_DTYPE)
+        self._count = 0
+        self._frames_saved = 0
+        self._queue = None
+        self._writer = None
+        self._error = None
+        self.chunk_size = chunk_size
+
+        if output_folder is None:
+            return
+
+        ensure_output_folder(output_folder)
+        base = os.path.splitext(unique_path(os.path.join(output_folder, 'tracked_coordinates.csv')))[0]
+        self.csv_path = base + '.csv'
+        self.txt_path = base + '.txt'
+        self.store_path = base + '.track'
+        self.image_folder = base
+        self.frame_writer = create_frame_writer(self.image_folder, image_format, png_compression,
+                                                encode_workers, fps)
+        self.store = TrackStore(self.store_path)
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    @property
+    def track(self):
+        """지금까지 기록된 스칼라 추적 데이터 (구조화 배열 view)"""
+        return self._track[:self._count]
+
+    def __len__(self):
+        return self._count
+
+    def record(self, frame_idx, timestamp, x, y, depth, frame_left=None, frame_right=None, disparity=None,
+               confidence=1.0, target=0):
+        """한 프레임의 추적 결과를 기록함. 큐가 가득 차면 저장이 따라잡을 때까지 대기함"""
+        self.record_targets(frame_idx, timestamp, [target], [x], [y], [depth], [confidence],
+                            frame_left, frame_right, disparity)
+
+    def record_targets(self, frame_idx, timestamp, targets, xs, ys, depths, confidences=None,
+                       frame_left=None, frame_right=None, disparity=None):
+        """한 프레임에서 여러 대상의 추적 결과를 행 단위로 기록함 (이미지는 프레임당 한 번만 저장)"""
+        count = len(targets)
+        while self._count + count > len(self._track):
+            self._track = np.resize(self._track, 2 * len(self._track))
+        rows = self._track[self._count:self._count + count]
+        rows['timestamp'] = timestamp
+        rows['frame_idx'] = frame_idx
+        rows['target'] = targets
+        rows['x'] = xs
+        rows['y'] = ys
+        rows['depth'] = depths
+        rows['confidence'] = 1.0 if confidences is None else confidences
+        self._count += count
+
+        if self._queue is None:
+            return
+        if self._error is not None:
+            raise RuntimeError(f"Tracking recorder failed: {self._error}")
+        images = (frame_left, frame_right, disparity) if self.frame_writer is not None else None
+        self._queue.put((self._frames_saved, rows.copy(), images))
+        self._frames_saved += 1
+
+    def close(self):
+        """남은 기록을 모두 쓰고 저장 스레드를 종료함"""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+            self._writer = None
+            if self._error is not None:
+                raise RuntimeError(f"Tracking recorder failed: {self._error}")
+
+        if self._count == 0:
+            print("No tracking data to save.")
+        elif self.output_folder is not None:
+            print(f"Data saved to {self.store_path}")
+            track = load_track(self.store_path)
+            save_to_csv(track, self.csv_path)
+            save_to_text_file(track, self.txt_path)
+        return self.track
+
+    def _write_loop(self):
+        chunk = np.zeros(self.chunk_size, dtype=TRACK_DTYPE)
+        pending = 0
+        stopped = False
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    stopped = True
+                    break
+                index, rows, images = item
+                for row in rows:
+                    chunk[pending] = row
+                    pending += 1
+                    if pending == len(chunk):
+                        self.store.append(chunk)
+                        pending = 0
+                if images is not None:
+                    self.frame_writer.write(index, *images)
+            self.store.append(chunk[:pending])
+            if self.frame_writer is not None:
+                self.frame_writer.close()
+        except Exception as exc:  # 저장 실패는 메인 루프에서 다시 발생시킴
+            self._error = exc
+            # 메인 스레드가 put에서 막히지 않도록 남은 항목 소비 (_STOP을 이미 받았으면 더 오지 않음)
+            while not stopped and self._queue.get() is not _STOP:
+                pass
+        finally:
+            self.store.close()
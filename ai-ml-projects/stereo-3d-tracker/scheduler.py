@@ -0,0 +1,83 @@
+import time
+
+# 품질 저하 단계 (뒤로 갈수록 이전 단계의 조치를 모두 포함함)
+#   full             : 매 프레임 전체 해상도 disparity
+#   reuse_disparity  : 처리하는 프레임 두 개 중 하나는 직전 disparity 재사용
+#   half_resolution  : disparity를 1/2 해상도에서만 계산
+#   drop_frames      : 입력 프레임을 drop_interval개 중 하나만 처리
+LEVELS = ('full', 'reuse_disparity', 'half_resolution', 'drop_frames')
+
+
+class AdaptiveScheduler:
+    """목표 프레임 시간을 지키도록 프레임 처리 비용의 지수이동평균(EMA)을 보고 품질 단계를 조절함
+
+    평균 비용이 목표를 넘으면 한 단계 낮추고, restore_ratio × 목표 아래로 충분히 내려가면 한 단계 올림.
+    단계를 바꾼 뒤 hold_frames 동안은 다시 바꾸지 않으며, 복구 직후 곧바로 다시 낮추게 되면
+    hold_frames를 두 배로 늘려 단계가 계속 오가는 것을 막음. 모든 결정은 출력하고 decisions에 남김
+    """
+
+    def __init__(self, target_fps=30.0, smoothing=0.2, restore_ratio=0.6, hold_frames=15,
+                 max_hold_frames=240, drop_interval=2):
+        self.target_ms = 1000.0 / target_fps
+        self.smoothing = smoothing
+        self.restore_ratio = restore_ratio
+        self.hold_frames = hold_frames
+        self.max_hold_frames = max_hold_frames
+        self.drop_interval = drop_interval
+        self.level = 0
+        self.average_ms = None
+        self.decisions = []  # (frame_idx, 단계 이름, 평균 비용 ms)
+        self._processed = 0
+        self._since_change = 0
+        self._last_change = None
+        self._start = None
+
+    @property
+    def level_name(self):
+        return LEVELS[self.level]
+
+    def should_drop(self, frame_idx):
+        """이 입력 프레임을 처리하지 않고 버릴지 여부"""
+        return self.level >= LEVELS.index('drop_frames') and frame_idx % self.drop_interval != 0
+
+    def reuse_disparity(self):
+        """이번 프레임은 직전 disparity를 재사용할지 여부"""
+        return self.level >= LEVELS.index('reuse_disparity') and self._processed % 2 == 1
+
+    def coarse_disparity(self):
+        """이번 프레임의 disparity를 1/2 해상도로 계산할지 여부"""
+        return self.level >= LEVELS.index('half_resolution')
+
+    def start_frame(self):
+        self._start = time.perf_counter()
+
+    def end_frame(self, frame_idx):
+        """처리한 프레임의 비용을 반영하고 필요하면 단계를 바꿈"""
+        cost_ms = (time.perf_counter() - self._start) * 1000
+        if self.average_ms is None:
+            self.average_ms = cost_ms
+        else:
+            self.average_ms += self.smoothing * (cost_ms - self.average_ms)
+        self._processed += 1
+        self._since_change += 1
+        if self._since_change < self.hold_frames:
+            return
+
+        if self.average_ms > self.target_ms and self.level < len(LEVELS) - 1:
+            if self._last_change == 'restore' and self._since_change < 2 * self.hold_frames:
+                self.hold_frames = min(self.max_hold_frames, 2 * self.hold_frames)
+            self._change(frame_idx, self.level + 1, 'degrade')
+        elif self.average_ms < self.restore_ratio * self.target_ms and self.level > 0:
+            self._change(frame_idx, self.level - 1, 'restore')
+
+    def _change(self, frame_idx, level, action):
+        if action == 'degrade':
+            reason = f"> budget {self.target_ms:.1f} ms"
+        else:
+            reason = f"< {self.restore_ratio * self.target_ms:.1f} ms ({self.restore_ratio:.0%} of budget)"
+        print(f"Scheduler at frame {frame_idx}: avg {self.average_ms:.1f} ms {reason}, "
+              f"{action} '{LEVELS[self.level]}' -> '{LEVELS[level]}'")
+        self.level = level
+        self._since_change = 0
+        self._last_change = action
+        self.decisions.append((frame_idx, LEVELS[level], self.average_ms))
@@ -2,7 +2,30 @@ import cv2
 import numpy as np
 from scipy.signal import correlate
 
-def synchronize_videos(cap_left, cap_right):
+SIGNATURE_SIZE = (32, 18)  # 프레임 시그니처 계산용 축소 해상도 (width, height)
+
+
+def synchronize_videos(cap_left, cap_right, method='fft', window=90, max_lag=None, signature='motion', subframe=True):
+    """좌/우 비디오의 시간 지연을 프레임 단위로 추정하고 앞선 스트림을 건너뜀"""
+    if method == 'pixel':
+        return synchronize_single_frame(cap_left, cap_right)
+    if max_lag is None:
+        max_lag = window // 2  # 겹치는 구간이 너무 짧은 지연은 신뢰도가 낮음
+
+    signature_left = frame_signatures(cap_left, window, signature)
+    signature_right = frame_signatures(cap_right, window, signature)
+    if len(signature_left) < 2 or len(signature_right) < 2:
+        return None, None, None
+
+    lag = estimate_frame_lag(signature_left, signature_right, max_lag, subframe)
+    # 움직임 시그니처는 첫 프레임에서 값을 만들지 않으므로 읽은 프레임이 하나 더 많음
+    extra = 1 if signature == 'motion' else 0
+    apply_frame_lag(cap_left, cap_right, int(round(lag)), len(signature_left) + extra, len(signature_right) + extra)
+    return cap_left, cap_right, lag
+
+
+def synchronize_single_frame(cap_left, cap_right):
+    """첫 프레임의 픽셀 상관으로 지연을 계산하는 기존 방식 (픽셀 단위, 보정 없음)"""
     ret_left, frame_left = cap_left.read()
     ret_right, frame_right = cap_right.read()
 
@@ -16,3 +39,72 @@ def synchronize_videos(cap_left, cap_right):
     lag = np.argmax(correlation) - (len(frame_left_gray.flatten()) - 1)
 
     return cap_left, cap_right, lag
+
+
+def frame_signatures(cap, window, signature='motion'):
+    """N개 프레임의 축소 평균 밝기(또는 움직임 에너지) 시계열을 계산함
+
+    움직임 에너지는 실제 연속 프레임 차이부터 시작하므로 N - 1개의 값을 반환함
+    (첫 프레임에 가짜 0을 넣으면 상호상관이 지연 0 쪽으로 끌려감)
+    """
+    values = []
+    previous = None
+    for _ in range(window):
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            break
+        small = cv2.resize(frame, SIGNATURE_SIZE, interpolation=cv2.INTER_AREA)
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        if signature == 'motion':
+            if previous is not None:
+                values.append(float(np.mean(np.abs(small - previous))))
+            previous = small
+        else:
+            values.append(float(small.mean()))
+    return np.asarray(values, dtype=np.float64)
+
+
+def estimate_frame_lag(signature_left, signature_right, max_lag=None, subframe=True):
+    """FFT 상호상관으로 프레임 지연을 추정함 (양수: 오른쪽 스트림이 lag 프레임 앞섬)"""
+    a = signature_left - signature_left.mean()
+    b = signature_right - signature_right.mean()
+    a /= np.linalg.norm(a) + 1e-12
+    b /= np.linalg.norm(b) + 1e-12
+
+    n = len(a) + len(b) - 1
+    n_fft = 1 << (n - 1).bit_length()
+    # c[k] = sum_i a[i] * b[i + k], 음수 k는 배열 뒤쪽에 위치
+    correlation = np.fft.irfft(np.conj(np.fft.rfft(a, n_fft)) * np.fft.rfft(b, n_fft), n_fft)
+    lags = np.concatenate([np.arange(0, len(b)), np.arange(-(len(a) - 1), 0)])
+    correlation = np.concatenate([correlation[:len(b)], correlation[n_fft - (len(a) - 1):]])
+
+    if max_lag is not None:
+        keep = np.abs(lags) <= max_lag
+        lags, correlation = lags[keep], correlation[keep]
+
+    order = np.argsort(lags)
+    lags, correlation = lags[order], correlation[order]
+    best = int(np.argmax(correlation))
+
+    # 포물선 보간으로 서브프레임 지연 추정
+    if subframe and 0 < best < len(correlation) - 1:
+        left, center, right = correlation[best - 1:best + 2]
+        denom = left - 2 * center + right
+        if denom != 0:
+            return float(lags[best] + 0.5 * (left - right) / denom)
+    return float(lags[best])
+
+
+def apply_frame_lag(cap_left, cap_right, lag, consumed_left, consumed_right):
+    """앞선 스트림의 시작 위치를 옮겨 두 스트림이 같은 순간에서 시작하도록 함"""
+    start_left, start_right = max(0, -lag), max(0, lag)
+    position_left = start_left if cap_left.set(cv2.CAP_PROP_POS_FRAMES, start_left) else consumed_left
+    position_right = start_right if cap_right.set(cv2.CAP_PROP_POS_FRAMES, start_right) else consumed_right
+
+    # 탐색이 불가능한 스트림: 현재 위치에서 상대 지연만큼 앞선 쪽을 읽어서 버림
+    skip_left = (position_right - position_left) - lag
+    for cap, skip in ((cap_left, skip_left), (cap_right, -skip_left)):
+        for _ in range(max(0, skip)):
+            ret, _ = cap.read()
+            if not ret:
+                break
@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+
+
+class SyntheticStereoSource:
+    """정답 disparity를 알고 있는 합성 스테레오 비디오 (StereoFrameSource와 같은 read() 인터페이스)
+
+    배경은 행마다 disparity가 background_disparity 범위에서 선형으로 변하는 기울어진 평면이고,
+    그 앞에서 원형 대상(disparity = target_disparity)이 리사주 궤적을 따라 움직임.
+    궤적 위상은 프레임마다 angular_step만큼 증가하므로 대상 속도는 클립 길이(frames)와 무관함.
+    disparity 값은 640 픽셀 폭 기준이며 해상도에 비례해 커짐
+    """
+
+    def __init__(self, width=640, height=360, frames=120, background_disparity=(8.0, 24.0),
+                 target_disparity=40.0, target_radius=None, start=0, seed=0, angular_step=2 * np.pi / 120):
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.angular_step = angular_step
+        scale = width / 640
+        self.target_disparity = float(round(target_disparity * scale))  # 대상은 정수 픽셀만큼 이동
+        self.target_radius = int(target_radius or max(12, height // 15))
+        self._index = start
+
+        rng = np.random.default_rng(seed)
+        self.background_disparity = np.linspace(*(np.array(background_disparity) * scale), height, dtype=np.float32)
+        self.left_background = texture(rng, height, width)
+        # 오른쪽 영상의 x 위치에는 왼쪽 영상의 x + d(y) 위치가 보임
+        map_x = np.arange(width, dtype=np.float32)[None, :] + self.background_disparity[:, None]
+        map_y = np.repeat(np.arange(height, dtype=np.float32)[:, None], width, axis=1)
+        self.right_background = cv2.remap(self.left_background, map_x, map_y, cv2.INTER_LINEAR,
+                                          borderMode=cv2.BORDER_REFLECT)
+
+        size = 2 * self.target_radius + 1
+        self.target_patch = texture(rng, size, size, low=96, high=255)
+        self.target_mask = np.zeros((size, size), dtype=bool)
+        yy, xx = np.ogrid[:size, :size]
+        self.target_mask[(xx - self.target_radius) ** 2 + (yy - self.target_radius) ** 2 <= self.target_radius ** 2] = True
+
+        # 왼쪽 영상의 탐색 여유(대상 disparity)와 오른쪽 영상에서의 이동을 피해 궤적 범위를 정함
+        margin = self.target_radius + 4
+        x_min = self.target_disparity * 1.6 + margin
+        self._center = np.array([(x_min + width - margin) / 2, height / 2])
+        self._amplitude = np.array([(width - margin - x_min) / 2, height / 2 - margin])
+
+    def trajectory(self, index):
+        """프레임 index에서 대상 중심의 정답 좌표 (x, y)"""
+        phase = self.angular_step * np.asarray(index, dtype=np.float64)
+        x = self._center[0] + self._amplitude[0] * np.sin(phase)
+        y = self._center[1] + self._amplitude[1] * np.sin(2 * phase)
+        return x, y
+
+    def true_disparity(self, index, xs, ys):
+        """프레임 index의 (xs, ys) 위치에서 정답 disparity"""
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.clip(np.asarray(ys, dtype=np.intp), 0, self.height - 1)
+        cx, cy = np.round(self.trajectory(index))
+        inside = (xs - cx) ** 2 + (ys - cy) ** 2 <= self.target_radius ** 2
+        return np.where(inside, self.target_disparity, self.background_disparity[ys]).astype(np.float32)
+
+    def render(self, index):
+        """프레임 index의 (left, right, 정답 disparity map)을 생성함"""
+        left = self.left_background.copy()
+        right = self.right_background.copy()
+        disparity = np.repeat(self.background_disparity[:, None], self.width, axis=1)
+        cx, cy = (int(v) for v in np.round(self.trajectory(index)))
+        r = self.target_radius
+        shift = int(self.target_disparity)
+        for image, x in ((left, cx), (right, cx - shift)):
+            region = image[cy - r:cy + r + 1, x - r:x + r + 1]
+            region[self.target_mask] = self.target_patch[self.target_mask]
+        disparity[cy - r:cy + r + 1, cx - r:cx + r + 1][self.target_mask] = shift
+        return left, right, disparity
+
+    def read(self):
+        if self._index >= self.frames:
+            return False, None, None
+        left, right, _ = self.render(self._index)
+        self._index += 1
+        return True, left, right
+
+    def __iter__(self):
+        while True:
+            ret, left, right = self.read()
+            if not ret:
+                return
+            yield left, right
+
+    def release(self):
+        self._index = self.frames
+
+
+def texture(rng, height, width, low=0, high=255):
+    """블록 매칭이 가능한 흐린 랜덤 질감 (BGR uint8)"""
+    noise = rng.integers(low, high, (height, width), dtype=np.uint8)
+    gray = cv2.GaussianBlur(noise, (5, 5), 1.0)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
@@ -0,0 +1,104 @@
+import os
+import time
+import numpy as np
+
+# 추적 루프 단계 (decode는 백그라운드 디코더로부터 프레임을 기다린 시간)
+STAGES = ('decode', 'resize', 'equalize', 'tracker', 'disparity', 'depth', 'save', 'display')
+
+FRAME_DTYPE = np.dtype(
+    [('frame_idx', 'i4'), ('time', 'f8')] + [(stage, 'f4') for stage in STAGES] + [('total', 'f4')]
+)
+RSS_DTYPE = np.dtype([('time', 'f8'), ('rss_mb', 'f4')])
+
+
+def current_rss_mb():
+    """현재 프로세스의 상주 메모리(RSS)를 MB 단위로 반환함"""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        import resource  # 최후 수단: 최대 RSS (macOS는 바이트, Linux는 KB 단위)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if os.uname().sysname == 'Darwin' else peak / 2**10
+
+
+class PipelineTelemetry:
+    """추적 루프의 단계별 소요 시간(ms)과 RSS 샘플을 미리 할당한 구조화 배열에 기록함
+
+    사용법: start_frame() 후 각 단계가 끝날 때마다 lap('단계'), 프레임 끝에서 end_frame()
+    """
+
+    def __init__(self, capacity=4096, rss_interval=0.5):
+        self.frames = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.rss = np.zeros(256, dtype=RSS_DTYPE)
+        self.frame_count = 0
+        self.rss_count = 0
+        self.rss_interval = rss_interval
+        self._origin = time.perf_counter()
+        self._last_rss = -np.inf
+        self._frame_start = self._last_lap = self._origin
+        self._row = None
+
+    def start_frame(self, frame_idx):
+        if self.frame_count == len(self.frames):
+            self.frames = np.resize(self.frames, 2 * len(self.frames))
+        self._row = self.frames[self.frame_count]
+        self._row['frame_idx'] = frame_idx
+        for stage in STAGES:
+            self._row[stage] = 0.0
+        self._frame_start = self._last_lap = time.perf_counter()
+
+    def lap(self, stage):
+        """직전 lap 이후 경과 시간을 해당 단계에 더함"""
+        now = time.perf_counter()
+        self._row[stage] += (now - self._last_lap) * 1000
+        self._last_lap = now
+
+    def end_frame(self):
+        now = time.perf_counter()
+        self._row['time'] = self._frame_start - self._origin
+        self._row['total'] = (now - self._frame_start) * 1000
+        self.frame_count += 1
+        if now - self._last_rss >= self.rss_interval:
+            self._last_rss = now
+            if self.rss_count == len(self.rss):
+                self.rss = np.resize(self.rss, 2 * len(self.rss))
+            self.rss[self.rss_count] = (now - self._origin, current_rss_mb())
+            self.rss_count += 1
+
+    def save(self, path):
+        """기록한 텔레메트리를 압축 npz 파일로 저장함"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        np.savez_compressed(path, frames=self.frames[:self.frame_count], rss=self.rss[:self.rss_count])
+        print(f"Telemetry saved to {path}")
+
+    def summary(self):
+        """단계별 평균 소요 시간(ms)"""
+        frames = self.frames[:self.frame_count]
+        return {stage: float(frames[stage].mean()) if len(frames) else 0.0 for stage in STAGES + ('total',)}
+
+
+class NullTelemetry:
+    """텔레메트리를 끈 경우 사용하는 아무 일도 하지 않는 대체 객체"""
+
+    def start_frame(self, frame_idx):
+        pass
+
+    def lap(self, stage):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+def load_telemetry(path):
+    """저장된 텔레메트리를 (frames, rss) 구조화 배열로 불러옴"""
+    with np.load(path) as data:
+        return data['frames'], data['rss']
@@ -0,0 +1,76 @@
+import json
+import os
+import numpy as np
+from utils import ensure_output_folder
+
+# 추적 결과 스칼라 컬럼 (이미지 배열은 저장하지 않음)
+TRACK_DTYPE = np.dtype([
+    ('timestamp', 'f8'),
+    ('frame_idx', 'i4'),
+    ('target', 'i2'),
+    ('x', 'i4'),
+    ('y', 'i4'),
+    ('depth', 'f4'),
+    ('confidence', 'f4'),
+])
+
+META_FILE = 'meta.json'
+
+
+class TrackStore:
+    """컬럼별 바이너리 파일에 추적 결과를 이어 쓰는 컬럼형 저장소
+
+    <path>/<column>.bin 파일에 각 컬럼을 원시 바이트로 append 하고,
+    컬럼 dtype과 행 수는 <path>/meta.json에 기록함
+    """
+
+    def __init__(self, path, dtype=TRACK_DTYPE):
+        self.path = path
+        self.dtype = dtype
+        self.length = 0
+        ensure_output_folder(path)
+        self._files = {name: open(column_path(path, name), 'wb') for name in dtype.names}
+        self._write_meta()
+
+    def append(self, rows):
+        """구조화 배열 청크를 컬럼별 파일 끝에 추가함"""
+        if len(rows) == 0:
+            return
+        for name, file in self._files.items():
+            file.write(np.ascontiguousarray(rows[name], dtype=self.dtype[name]).tobytes())
+        self.length += len(rows)
+        self._write_meta()
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+        self._write_meta()
+
+    def _write_meta(self):
+        for file in self._files.values():
+            if not file.closed:
+                file.flush()
+        meta = {
+            'length': self.length,
+            'columns': {name: self.dtype[name].str for name in self.dtype.names},
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as file:
+            json.dump(meta, file)
+
+
+def column_path(path, name):
+    return os.path.join(path, f"{name}.bin")
+
+
+def load_track(path, mmap=True):
+    """저장된 추적 결과를 컬럼 이름 -> 배열 dict로 불러옴 (기본값: 메모리 맵)"""
+    with open(os.path.join(path, META_FILE)) as file:
+        meta = json.load(file)
+    length = meta['length']
+    columns = {}
+    for name, dtype in meta['columns'].items():
+        if mmap and length > 0:
+            columns[name] = np.memmap(column_path(path, name), dtype=np.dtype(dtype), mode='r', shape=(length,))
+        else:
+            columns[name] = np.fromfile(column_path(path, name), dtype=np.dtype(dtype), count=length)
+    return columns
@@ -1,15 +1,86 @@
 import cv2
+import numpy as np
 import time
 
-def initialize_tracker(frame, point):
-    tracker = cv2.TrackerCSRT_create()
-    bbox = (int(point[0]) - 10, int(point[1]) - 10, 20, 20)
+BBOX_SIZE = 20  # 추적 윈도우 크기 (픽셀)
+TRACKER_BACKENDS = ('csrt', 'kcf', 'mosse', 'lk')
+
+# 캘리브레이션 파일이 없을 때 사용하는 기본 카메라 파라미터
+BASELINE = 0.1  # Baseline (meter)
+FOCAL_LENGTH = 0.02  # Focal length (meter)
+# 위 값에 해당하는 재투영 행렬 (Z = B * f / d)
+DEFAULT_Q = np.array([
+    [1, 0, 0, 0],
+    [0, 1, 0, 0],
+    [0, 0, 0, BASELINE * FOCAL_LENGTH],
+    [0, 0, 1, 0],
+], dtype=np.float64)
+
+class LKPointTracker:
+    """피라미드 Lucas-Kanade 광류로 bbox 중심 한 점만 추적하는 경량 추적기 (OpenCV 추적기와 같은 인터페이스)"""
+
+    def __init__(self, win_size=(21, 21), max_level=3, max_fb_error=1.0):
+        self.lk_params = dict(winSize=win_size, maxLevel=max_level,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+        self.max_fb_error = max_fb_error
+        self.prev_gray = None
+        self.point = None
+        self.size = (BBOX_SIZE, BBOX_SIZE)
+
+    def init(self, frame, bbox):
+        x, y, w, h = bbox
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.point = np.array([[[x + w / 2, y + h / 2]]], dtype=np.float32)
+        self.size = (w, h)
+        return True
+
+    def update(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        point, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.point, None, **self.lk_params)
+        ok = status is not None and status[0][0] == 1
+        if ok:
+            # 전방-후방 일관성 검사로 잘못된 추적 제거
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, point, None, **self.lk_params)
+            ok = back_status[0][0] == 1 and np.linalg.norm(back - self.point) <= self.max_fb_error
+        self.prev_gray = gray
+        if not ok:
+            return False, None
+        self.point = point
+        w, h = self.size
+        cx, cy = point[0, 0]
+        return True, (cx - w / 2, cy - h / 2, w, h)
+
+def create_tracker(backend='csrt'):
+    """선택한 백엔드의 추적기를 생성함 (csrt: 정확, kcf/mosse: 빠름, lk: 단일 점 광류)"""
+    if backend == 'lk':
+        return LKPointTracker()
+    names = {'csrt': 'TrackerCSRT_create', 'kcf': 'TrackerKCF_create', 'mosse': 'TrackerMOSSE_create'}
+    if backend not in names:
+        raise ValueError(f"Unknown tracker backend: {backend} (choose from {', '.join(TRACKER_BACKENDS)})")
+    # OpenCV 4.5.1+ 에서는 일부 추적기가 cv2.legacy 로 이동함 (opencv-contrib-python 필요)
+    for module in (cv2, getattr(cv2, 'legacy', None)):
+        factory = getattr(module, names[backend], None)
+        if factory is not None:
+            return factory()
+    raise RuntimeError(f"Tracker backend '{backend}' is not available in this OpenCV build.")
+
+def point_bbox(point, size=BBOX_SIZE):
+    """포인트를 중심으로 하는 (x, y, w, h) bbox"""
+    return (int(point[0]) - size // 2, int(point[1]) - size // 2, size, size)
+
+def initialize_tracker(frame, point, backend='csrt'):
+    tracker = create_tracker(backend)
+    bbox = point_bbox(point)
     tracker.init(frame, bbox)
     return tracker
 
-def update_tracker(frame, point):
-    tracker = cv2.TrackerCSRT_create()
-    bbox = (int(point[0]) - 10, int(point[1]) - 10, 20, 20)
+def initialize_trackers(frame, points, backend='csrt'):
+    """시드 포인트마다 추적기를 하나씩 생성함"""
+    return [initialize_tracker(frame, point, backend) for point in points]
+
+def update_tracker(frame, point, backend='csrt'):
+    tracker = create_tracker(backend)
+    bbox = point_bbox(point)
     tracker.init(frame, bbox)
     return tracker
 
@@ -25,9 +96,42 @@ def track_object(tracker, frame, frame_gray, disparity, point):
 
     return False, None, None, None, None
 
-def compute_depth(disparity, x, y):
-    disparity_value = disparity[y, x]
-    B = 0.1  # Baseline (meter)
-    f = 0.02  # Focal length (meter)
-    depth= (B * f) / disparity_value if disparity_value != 0 else 0
-    return depth
\ No newline at end of file
+def update_trackers(trackers, frame):
+    """모든 추적기를 갱신하고 (성공 여부, 중심 x, 중심 y) 배열을 반환함"""
+    successes = np.zeros(len(trackers), dtype=bool)
+    centers = np.zeros((len(trackers), 2), dtype=np.int32)
+    for i, tracker in enumerate(trackers):
+        success, bbox = tracker.update(frame)
+        if success:
+            x, y, w, h = [int(v) for v in bbox]
+            successes[i] = True
+            centers[i] = (x + w // 2, y + h // 2)
+    return successes, centers[:, 0], centers[:, 1]
+
+def disparity_to_depth(disparity, Q=None):
+    """재투영 행렬 Q로 disparity를 깊이로 변환함: Z = Q[2,3] / (Q[3,2] * d + Q[3,3])
+
+    disparity가 0 이하이거나 깊이가 양수가 아닌 곳은 0
+    """
+    Q = DEFAULT_Q if Q is None else Q
+    disparity = np.asarray(disparity, dtype=np.float32)
+    denominator = disparity * np.float32(Q[3, 2]) + np.float32(Q[3, 3])
+    depth = np.zeros(disparity.shape, dtype=np.float32)
+    np.divide(np.float32(Q[2, 3]), denominator, out=depth, where=(disparity > 0) & (denominator > 0))
+    return depth
+
+def compute_depths(disparity, xs, ys, Q=None):
+    """여러 좌표의 깊이를 한 번에 계산함 (이미지 밖이거나 disparity가 0 이하이면 0)"""
+    height, width = disparity.shape[:2]
+    xs = np.asarray(xs, dtype=np.intp)
+    ys = np.asarray(ys, dtype=np.intp)
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    disparity_values = np.zeros(len(xs), dtype=np.float32)
+    disparity_values[inside] = disparity[ys[inside], xs[inside]]
+    return disparity_to_depth(disparity_values, Q)
+
+def compute_depth_map(disparity, Q=None):
+    return disparity_to_depth(disparity, Q)
+
+def compute_depth(disparity, x, y, Q=None):
+    return float(disparity_to_depth(disparity[y, x], Q))
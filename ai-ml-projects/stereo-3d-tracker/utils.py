@@ -17,38 +17,54 @@ def ensure_output_folder(folder):
     if not os.path.exists(folder):
         os.makedirs(folder)
 
-def save_to_csv(data, filename):
+def unique_path(filename):
     """
-    Save tracking data to a CSV file. If the file already exists, create a new file with an incremented counter.
+    Return filename, or filename with an incremented counter if it already exists.
     """
-    df = pd.DataFrame(data, columns=['Timestamp', 'X', 'Y', 'Depth', 'Frame Left', 'Frame Right', 'Disparity'])
     base, extension = os.path.splitext(filename)
     counter = 1
     new_filename = filename
     while os.path.exists(new_filename):
         new_filename = f"{base}_{counter}{extension}"
         counter += 1
+    return new_filename
+
+CSV_COLUMNS = {
+    'timestamp': 'Timestamp',
+    'frame_idx': 'Frame',
+    'target': 'Target',
+    'x': 'X',
+    'y': 'Y',
+    'depth': 'Depth',
+    'confidence': 'Confidence',
+}
+
+def save_to_csv(track, filename):
+    """
+    Export scalar tracking columns (dict of arrays or structured array) to a CSV file.
+    If the file already exists, create a new file with an incremented counter.
+    """
+    names = track.dtype.names if hasattr(track, 'dtype') else list(track)
+    df = pd.DataFrame({CSV_COLUMNS.get(name, name): np.asarray(track[name]) for name in names})
+    new_filename = unique_path(filename)
     df.to_csv(new_filename, index=False)
     print(f"Data saved to {new_filename}")
+    return new_filename
 
-def save_to_text_file(data, filename):
+def save_to_text_file(track, filename):
     """
     Save tracking data to a text file. If the file already exists, create a new file with an incremented counter.
     """
-    base, extension = os.path.splitext(filename)
-    counter = 1
-    new_filename = filename
-    while os.path.exists(new_filename):
-        new_filename = f"{base}_{counter}{extension}"
-        counter += 1
+    new_filename = unique_path(filename)
 
     with open(new_filename, 'w') as file:
-        file.write(f"{'Timestamp':<20} {'X':<10} {'Y':<10} {'Depth':<10}\n")
-        file.write("="*60 + "\n")
-        for entry in data:
-            timestamp, x, y, depth, _, _, _ = entry
-            file.write(f"{timestamp:<20} {x:<10} {y:<10} {depth:<10}\n")
+        file.write(f"{'Timestamp':<20} {'Target':<8} {'X':<10} {'Y':<10} {'Depth':<10}\n")
+        file.write("="*70 + "\n")
+        rows = zip(track['timestamp'], track['target'], track['x'], track['y'], track['depth'])
+        for timestamp, target, x, y, depth in rows:
+            file.write(f"{timestamp!s:<20} {target!s:<8} {x!s:<10} {y!s:<10} {depth!s:<10}\n")
     print(f"Data saved to {new_filename}")
+    return new_filename
 
 def save_images(left_img, right_img, disparity, output_folder, frame_idx):
     ensure_output_folder(output_folder)
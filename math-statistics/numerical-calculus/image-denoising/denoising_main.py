@@ -7,11 +7,21 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.font_manager as fm
 import argparse
+import csv
+import glob
 import os
 import platform
-from skimage import io, metrics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from skimage import io
 from skimage.restoration import denoise_tv_chambolle, denoise_bilateral
-from skimage.util import random_noise, img_as_float
+from skimage.util import img_as_float, img_as_float32, img_as_ubyte
+from tv_solver import chambolle_tv
+from metrics import image_metrics, batch_metrics, clear_cache
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+ALGORITHMS = ('tv', 'bilateral')
+DTYPES = {'float32': np.float32, 'float64': np.float64}
 
 
 def setup_korean_font():
@@ -39,53 +49,47 @@ def setup_korean_font():
         return False
 
 
-def load_image(path):
-    """이미지 불러오기"""
+def load_image(path, dtype=np.float64):
+    """이미지 불러오기 (dtype이 float32면 8비트 이미지를 float64를 거치지 않고 바로 변환)"""
     if not os.path.exists(path):
         print(f"파일 없음: {path}")
         return None
-    return img_as_float(io.imread(path))
+    image = io.imread(path)
+    return img_as_float32(image) if np.dtype(dtype) == np.float32 else img_as_float(image)
+
 
+def add_gaussian_noise(image, variance=0.01, seed=None):
+    """가우시안 노이즈 추가 (입력 dtype 유지, 결과는 [0, 1]로 자름)
 
-def add_gaussian_noise(image, variance=0.01):
-    """가우시안 노이즈 추가"""
-    return random_noise(image, mode='gaussian', var=variance)
+    random_noise는 float32 입력도 float64로 바꾸므로 노이즈를 입력 dtype으로 직접 생성함
+    """
+    rng = np.random.default_rng(seed)
+    noisy = rng.standard_normal(image.shape, dtype=image.dtype)
+    noisy *= np.sqrt(variance)
+    noisy += image
+    return np.clip(noisy, 0, 1, out=noisy)
 
 
-def total_variation_denoise(noisy_image, weight=0.1):
+def total_variation_denoise(noisy_image, weight=0.1, max_num_iter=200):
     """Total Variation 디노이징"""
-    return denoise_tv_chambolle(noisy_image, weight=weight)
+    return denoise_tv_chambolle(noisy_image, weight=weight, max_num_iter=max_num_iter)
 
 
 def bilateral_denoise(noisy_image, sigma_color=0.05, sigma_spatial=15):
     """Bilateral 필터 디노이징"""
-    return denoise_bilateral(noisy_image, sigma_color=sigma_color, sigma_spatial=sigma_spatial)
+    channel_axis = -1 if len(noisy_image.shape) == 3 else None
+    return denoise_bilateral(noisy_image, sigma_color=sigma_color, sigma_spatial=sigma_spatial,
+                             channel_axis=channel_axis)
 
 
 def calculate_psnr(original, processed):
-    """PSNR 계산"""
-    return metrics.peak_signal_noise_ratio(original, processed)
+    """PSNR 계산 (같은 쌍은 실행 중 한 번만 계산)"""
+    return image_metrics(original, processed)['psnr']
 
 
 def calculate_ssim(original, processed):
-    """SSIM 계산"""
-    channel_axis = -1 if len(original.shape) == 3 else None
-    return metrics.structural_similarity(original, processed, channel_axis=channel_axis, data_range=1.0)
-
-
-def energy_function(u, f, lambda_val=0.1):
-    """TV 에너지 함수 계산"""
-    data_term = np.sum((u - f)**2)
-    
-    if len(u.shape) == 3:
-        grad_u_x = np.gradient(u, axis=0)
-        grad_u_y = np.gradient(u, axis=1)
-        reg_term = np.sum(np.sqrt(grad_u_x**2 + grad_u_y**2))
-    else:
-        grad_u = np.gradient(u)
-        reg_term = np.sum(np.sqrt(grad_u[0]**2 + grad_u[1]**2))
-    
-    return data_term + lambda_val * reg_term
+    """SSIM 계산 (같은 쌍은 실행 중 한 번만 계산)"""
+    return image_metrics(original, processed)['ssim']
 
 
 def show_comparison_results(original, noisy, tv_result, bilateral_result, save_path=None):
@@ -124,25 +128,20 @@ def show_comparison_results(original, noisy, tv_result, bilateral_result, save_p
     plt.show()
 
 
-def analyze_convergence(original, noisy, max_iter=10, save_path=None):
-    """TV 알고리즘 수렴 분석"""
+def analyze_convergence(original, noisy, max_iter=200, save_path=None, weight=0.1):
+    """TV 알고리즘 수렴 분석 (Chambolle 솔버 한 번 실행의 반복별 에너지와 PSNR)"""
     energies = []
     psnr_values = []
-    current_image = noisy.copy()
     
-    for i in range(max_iter + 1):
-        if i > 0:
-            current_image = denoise_tv_chambolle(current_image, weight=0.1)
-        
-        energy = energy_function(current_image, original)
-        psnr = calculate_psnr(original, current_image)
-        
+    def record(iteration, u, energy, psnr):
         energies.append(energy)
         psnr_values.append(psnr)
     
+    chambolle_tv(noisy, weight=weight, max_num_iter=max_iter, callback=record, reference=original)
+    
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
     
-    iterations = np.arange(max_iter + 1)
+    iterations = np.arange(len(energies))
     ax1.plot(iterations, energies, 'o-', color='blue')
     ax1.set_title('에너지 함수 수렴')
     ax1.set_xlabel('반복 횟수')
@@ -167,6 +166,130 @@ def analyze_convergence(original, noisy, max_iter=10, save_path=None):
     return energies, psnr_values
 
 
+def check_precision(original, variance=0.01, seed=0):
+    """같은 노이즈 이미지로 float64 경로와 float32 경로를 실행해 PSNR 차이를 보고
+
+    반환값은 알고리즘별 (float32 PSNR - float64 PSNR) 딕셔너리
+    """
+    original64 = original.astype(np.float64)
+    noisy64 = add_gaussian_noise(original64, variance, seed)
+    original32 = original64.astype(np.float32)
+    noisy32 = noisy64.astype(np.float32)
+
+    print("\n=== float32 정밀도 검사 ===")
+    differences = {}
+    for name, denoise in (('Total Variation', total_variation_denoise), ('Bilateral Filter', bilateral_denoise)):
+        start = time.perf_counter()
+        result64 = denoise(noisy64)
+        seconds64 = time.perf_counter() - start
+        start = time.perf_counter()
+        result32 = denoise(noisy32)
+        seconds32 = time.perf_counter() - start
+        if result32.dtype != np.float32:
+            print(f"⚠ {name}: float32 입력이 {result32.dtype}로 바뀜")
+
+        psnr64 = calculate_psnr(original64, result64)
+        psnr32 = calculate_psnr(original32, result32)
+        differences[name] = psnr32 - psnr64
+        max_error = np.max(np.abs(result32 - result64.astype(np.float32)))
+        print(f"{name} - PSNR float64: {psnr64:.4f}dB, float32: {psnr32:.4f}dB, 차이: {psnr32 - psnr64:+.2e}dB, "
+              f"최대 픽셀 차이: {max_error:.2e}, 시간: {seconds64:.2f}s → {seconds32:.2f}s")
+    return differences
+
+
+def collect_images(pattern):
+    """디렉터리면 안의 이미지 파일들을, 아니면 glob 패턴에 맞는 파일들을 정렬해서 반환"""
+    if os.path.isdir(pattern):
+        paths = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+    else:
+        paths = glob.glob(pattern)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def denoise_file(path, output_dir, variance=0.01, seed=None, dtype=np.float64):
+    """이미지 한 장에 노이즈 추가 → TV/Bilateral 디노이징 → 결과 저장 (워커 프로세스에서 실행)
+
+    반환값은 알고리즘별 {'image', 'algorithm', 'psnr', 'ssim', 'seconds'} 행 목록
+    """
+    original = load_image(path, dtype)
+    if original is None:
+        return []
+    if original.ndim == 3 and original.shape[-1] == 4:
+        original = original[..., :3]  # 알파 채널 제외
+    noisy = add_gaussian_noise(original, variance, seed)
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    rows = []
+    for algorithm, denoise in (('tv', total_variation_denoise), ('bilateral', bilateral_denoise)):
+        start = time.perf_counter()
+        result = denoise(noisy)
+        seconds = time.perf_counter() - start
+        io.imsave(os.path.join(output_dir, f'{name}_{algorithm}.png'), img_as_ubyte(np.clip(result, 0, 1)),
+                  check_contrast=False)
+        scores = image_metrics(original, result)
+        rows.append({
+            'image': os.path.basename(path),
+            'algorithm': algorithm,
+            'psnr': scores['psnr'],
+            'ssim': scores['ssim'],
+            'seconds': seconds,
+        })
+    clear_cache()  # 워커가 처리한 이미지들을 캐시에 붙잡아 두지 않도록 비움
+    return rows
+
+
+def run_batch(pattern, output_dir, variance=0.01, workers=None, seed=0, dtype=np.float64):
+    """여러 이미지를 프로세스 풀에서 한 장씩 처리하고 지표 표를 출력/저장 (그림은 띄우지 않음)"""
+    paths = collect_images(pattern)
+    if not paths:
+        print(f"이미지 없음: {pattern}")
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    print(f"배치 처리: {len(paths)}장, 워커 {workers}개")
+
+    rows = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 이미지마다 다른 시드를 주되 실행 간에는 재현 가능하게 함
+        futures = {executor.submit(denoise_file, path, output_dir, variance, seed + i, dtype): path
+                   for i, path in enumerate(paths)}
+        for future in as_completed(futures):
+            try:
+                image_rows = future.result()
+            except Exception as exc:
+                print(f"처리 실패: {futures[future]} ({exc})")
+                continue
+            rows.extend(image_rows)
+            print(f"완료: {futures[future]}")
+    elapsed = time.perf_counter() - start
+    rows.sort(key=lambda row: (row['image'], ALGORITHMS.index(row['algorithm'])))
+
+    print("\n=== 배치 성능 분석 결과 ===")
+    header = f"{'이미지':<30} {'알고리즘':<10} {'PSNR(dB)':>9} {'SSIM':>7} {'시간(s)':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['image']:<30} {row['algorithm']:<10} {row['psnr']:>9.2f} {row['ssim']:>7.3f} {row['seconds']:>8.2f}")
+    for algorithm in ALGORITHMS:
+        selected = [row for row in rows if row['algorithm'] == algorithm]
+        if selected:
+            print(f"평균 {algorithm:<10} - PSNR: {np.mean([r['psnr'] for r in selected]):.2f}dB, "
+                  f"SSIM: {np.mean([r['ssim'] for r in selected]):.3f}")
+
+    metrics_path = os.path.join(output_dir, 'metrics.csv')
+    with open(metrics_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=['image', 'algorithm', 'psnr', 'ssim', 'seconds'])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"지표 저장: {metrics_path}")
+
+    done = len({row['image'] for row in rows})
+    print(f"처리량: {done}장 / {elapsed:.2f}s = {done / elapsed:.2f} images/s")
+    return rows
+
+
 def main():
     parser = argparse.ArgumentParser(description='이미지 디노이징 알고리즘 비교')
     parser.add_argument('--input', '-i', default='sample.jpg',
@@ -177,8 +300,21 @@ def main():
                        help='노이즈 분산 (기본값: 0.01)')
     parser.add_argument('--convergence', '-c', action='store_true',
                        help='수렴 분석 실행')
+    parser.add_argument('--batch', '-b',
+                       help='배치 모드: 이미지 디렉터리 또는 glob 패턴 (예: "photos/*.jpg")')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                       help='배치 모드 워커 프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--dtype', choices=list(DTYPES), default='float64',
+                       help='처리 정밀도 (float32: 메모리 사용량과 연산량 절반, 기본값: float64)')
+    parser.add_argument('--check-precision', action='store_true',
+                       help='float32 경로와 float64 경로의 PSNR 차이 보고 후 종료')
     
     args = parser.parse_args()
+    dtype = DTYPES[args.dtype]
+    
+    if args.batch:
+        run_batch(args.batch, args.output, args.noise, args.workers, dtype=dtype)
+        return
     
     # 한글 폰트 설정
     font_ok = setup_korean_font()
@@ -186,15 +322,19 @@ def main():
         print("⚠ 한글 폰트 미지원")
     
     # 이미지 로드
-    original_image = load_image(args.input)
+    original_image = load_image(args.input, dtype)
     if original_image is None:
         print("기본 샘플 이미지 생성")
         # 간단한 테스트 이미지 생성
-        original_image = np.zeros((100, 100))
+        original_image = np.zeros((100, 100), dtype=dtype)
         original_image[20:80, 20:40] = 1.0  # 사각형
         original_image[20:40, 60:80] = 0.5  # 회색 사각형
     
-    print(f"이미지 크기: {original_image.shape}")
+    print(f"이미지 크기: {original_image.shape}, dtype: {original_image.dtype}")
+    
+    if args.check_precision:
+        check_precision(original_image, args.noise)
+        return
     
     # 노이즈 추가
     noisy_image = add_gaussian_noise(original_image, args.noise)
@@ -207,11 +347,10 @@ def main():
     print("Bilateral Filter 처리 중...")
     bilateral_result = bilateral_denoise(noisy_image)
     
-    # 성능 지표 계산
-    tv_psnr = calculate_psnr(original_image, tv_result)
-    tv_ssim = calculate_ssim(original_image, tv_result)
-    bil_psnr = calculate_psnr(original_image, bilateral_result)
-    bil_ssim = calculate_ssim(original_image, bilateral_result)
+    # 성능 지표 계산 (참조 통계를 공유하고, 결과는 시각화에서 캐시로 재사용)
+    tv_metrics, bil_metrics = batch_metrics(original_image, [tv_result, bilateral_result])
+    tv_psnr, tv_ssim = tv_metrics['psnr'], tv_metrics['ssim']
+    bil_psnr, bil_ssim = bil_metrics['psnr'], bil_metrics['ssim']
     
     print("\n=== 성능 분석 결과 ===")
     print(f"Total Variation - PSNR: {tv_psnr:.2f}dB, SSIM: {tv_ssim:.3f}")
@@ -226,7 +365,7 @@ def main():
         conv_path = os.path.join(args.output, 'convergence_analysis.png')
         print("\n수렴 분석 실행 중...")
         energies, psnr_vals = analyze_convergence(original_image, noisy_image, save_path=conv_path)
-        print(f"최종 에너지: {energies[-1]:.2e}")
+        print(f"반복 횟수: {len(energies)}, 최종 에너지: {energies[-1]:.2e}")
         print(f"PSNR 개선: {psnr_vals[0]:.2f}dB → {psnr_vals[-1]:.2f}dB")
 
 
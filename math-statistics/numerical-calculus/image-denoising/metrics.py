@@ -0,0 +1,130 @@
+"""
+MSE / PSNR / SSIM 단일 패스 계산
+
+참조 이미지의 국소 평균/분산(박스 필터)을 한 번만 계산해 두고 후보 이미지마다
+MSE, PSNR, SSIM을 함께 계산함. SSIM은 skimage.metrics.structural_similarity의
+기본 설정(7x7 균일 창, 표본 공분산, K1=0.01, K2=0.03)과 같은 값을 냄.
+(참조, 후보) 쌍별 결과는 실행 중 캐시에 보관해 보고와 시각화가 같은 값을 다시 계산하지 않음
+"""
+
+import numpy as np
+from scipy.ndimage import uniform_filter
+
+K1 = 0.01
+K2 = 0.03
+WIN_SIZE = 7
+
+# 배열 id 기준 캐시. 값과 함께 배열 자체를 보관해 id가 다른 배열에 재사용되지 않게 함
+_engines = {}
+_results = {}
+
+
+class ReferenceMetrics:
+    """참조 이미지 하나에 대해 여러 후보의 MSE/PSNR/SSIM을 계산
+
+    참조의 국소 평균 ux와 분산 vx는 생성 시 한 번 계산하고, 후보별 필터 결과는
+    미리 할당한 버퍼를 재사용함. 계산은 참조 dtype(float32/float64)으로 수행함
+    """
+
+    def __init__(self, reference, data_range=1.0, win_size=WIN_SIZE):
+        self.reference = np.asarray(reference)
+        if not np.issubdtype(self.reference.dtype, np.floating):
+            self.reference = self.reference.astype(np.float64)
+        self.dtype = self.reference.dtype
+        self.data_range = data_range
+        # 마지막 축이 채널이면 채널마다 따로 필터링 (skimage의 channel_axis=-1과 같음)
+        self.size = (win_size, win_size, 1) if self.reference.ndim == 3 else win_size
+        self.pad = (win_size - 1) // 2
+        self.cov_norm = win_size ** 2 / (win_size ** 2 - 1)
+        self.c1 = (K1 * data_range) ** 2
+        self.c2 = (K2 * data_range) ** 2
+
+        x = self.reference
+        self.ux = uniform_filter(x, self.size)
+        self.vx = uniform_filter(x * x, self.size)
+        self.vx -= self.ux * self.ux
+        self.vx *= self.cov_norm
+        self._buffers = [np.empty_like(x) for _ in range(4)]
+
+    def evaluate(self, candidate):
+        """후보 하나의 {'mse', 'psnr', 'ssim'}"""
+        y = np.asarray(candidate, dtype=self.dtype)
+        if y.shape != self.reference.shape:
+            raise ValueError(f"이미지 크기가 다름: {self.reference.shape} vs {y.shape}")
+        x, ux, vx = self.reference, self.ux, self.vx
+        uy, vy, vxy, scratch = self._buffers
+
+        # MSE (합산은 float64)
+        np.subtract(x, y, out=scratch)
+        mse = float(np.vdot(scratch, scratch)) / scratch.size
+        psnr = float(10 * np.log10(self.data_range ** 2 / mse)) if mse > 0 else np.inf
+
+        # 국소 평균/분산/공분산
+        uniform_filter(y, self.size, output=uy)
+        np.multiply(y, y, out=scratch)
+        uniform_filter(scratch, self.size, output=vy)
+        np.multiply(x, y, out=scratch)
+        uniform_filter(scratch, self.size, output=vxy)
+        np.multiply(uy, uy, out=scratch)
+        vy -= scratch
+        vy *= self.cov_norm
+        np.multiply(ux, uy, out=scratch)
+        vxy -= scratch
+        vxy *= self.cov_norm
+
+        # S = (2·ux·uy + C1)(2·vxy + C2) / ((ux² + uy² + C1)(vx + vy + C2))
+        vxy *= 2
+        vxy += self.c2              # A2
+        vy += vx
+        vy += self.c2               # B2
+        vxy /= vy                   # A2 / B2
+        np.multiply(ux, uy, out=scratch)
+        scratch *= 2
+        scratch += self.c1          # A1
+        vxy *= scratch
+        np.multiply(uy, uy, out=uy)
+        uy += ux * ux
+        uy += self.c1               # B1
+        vxy /= uy
+
+        pad = self.pad
+        ssim = float(vxy[pad:vxy.shape[0] - pad, pad:vxy.shape[1] - pad].mean(dtype=np.float64))
+        return {'mse': mse, 'psnr': psnr, 'ssim': ssim}
+
+    def evaluate_batch(self, candidates):
+        """여러 후보의 지표 목록 (참조 통계와 버퍼를 공유)"""
+        return [self.evaluate(candidate) for candidate in candidates]
+
+
+def reference_metrics(reference):
+    """참조 이미지의 ReferenceMetrics (실행 중 같은 배열이면 재사용)"""
+    key = id(reference)
+    cached = _engines.get(key)
+    if cached is None or cached[0] is not reference:
+        cached = (reference, ReferenceMetrics(reference))
+        _engines[key] = cached
+    return cached[1]
+
+
+def image_metrics(reference, candidate):
+    """(참조, 후보) 쌍의 {'mse', 'psnr', 'ssim'} (캐시됨)
+
+    캐시는 배열 객체 기준이므로 계산 후 배열 내용을 제자리에서 바꾸면 clear_cache()를 호출해야 함
+    """
+    key = (id(reference), id(candidate))
+    cached = _results.get(key)
+    if cached is None or cached[0] is not reference or cached[1] is not candidate:
+        cached = (reference, candidate, reference_metrics(reference).evaluate(candidate))
+        _results[key] = cached
+    return cached[2]
+
+
+def batch_metrics(reference, candidates):
+    """참조 하나에 대한 여러 후보의 지표 목록 (캐시됨)"""
+    return [image_metrics(reference, candidate) for candidate in candidates]
+
+
+def clear_cache():
+    """캐시한 참조 통계와 결과를 모두 비움 (보관 중인 배열도 놓아줌)"""
+    _engines.clear()
+    _results.clear()
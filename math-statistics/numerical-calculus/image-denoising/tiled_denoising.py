@@ -0,0 +1,193 @@
+"""
+대용량 이미지용 타일 기반 디노이징 (out-of-core)
+
+입력을 메모리 맵으로 열고 겹치는 타일을 워커 프로세스에서 디노이징한 뒤
+경계를 선형 가중치로 섞어 메모리 맵 출력(.npy)에 씀.
+.npy 입력이면 동시에 메모리에 올라가는 것은 처리 중인 타일들뿐이므로 이미지 크기와 무관하게
+최대 메모리가 제한됨 (다른 형식은 open_input 참고)
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from math import ceil
+import numpy as np
+from skimage import io
+from skimage.util import img_as_float
+from denoising_main import bilateral_denoise
+from tv_solver import chambolle_tv
+
+
+def tile_halo(algorithm, sigma_spatial=15, tv_iterations=50):
+    """한 픽셀의 결과에 영향을 주는 입력 범위 (픽셀)
+
+    bilateral은 필터 창 반지름(skimage 기본 창 크기 기준)이면 내부 결과가 전체 처리와 같음.
+    Chambolle TV는 반복마다 영향이 한 픽셀씩 퍼지므로 반복 횟수가 최대 도달 거리임.
+    타일마다 조기 종료 시점이 달라지지 않도록 TV는 항상 고정 횟수만큼 반복함 (denoise_tile 참고)
+    """
+    if algorithm == 'bilateral':
+        return max(5, 2 * int(ceil(3 * sigma_spatial)) + 1) // 2
+    return tv_iterations
+
+
+def open_input(path, work_dir):
+    """입력을 읽기 전용 메모리 맵으로 엶. 반환값은 (.npy 경로, 배열, 임시 파일 여부)
+
+    .npy는 그대로 메모리 맵으로 열고, 그 외 형식은 한 번만 디코딩해 원래 dtype(보통 uint8)의
+    임시 .npy로 저장함 (float64 변환은 타일 단위로만 수행).
+    디코딩 단계에서는 원본 dtype의 전체 이미지가 한 번 메모리에 올라가므로, 메모리보다 큰 이미지는
+    미리 .npy로 변환해 넘겨야 out-of-core로 처리됨
+    """
+    if path.lower().endswith('.npy'):
+        return path, np.load(path, mmap_mode='r'), False
+    decoded = io.imread(path)
+    if decoded.ndim == 3 and decoded.shape[-1] == 4:
+        decoded = decoded[..., :3]  # 알파 채널 제외
+    fd, npy_path = tempfile.mkstemp(suffix='.npy', dir=work_dir)
+    os.close(fd)
+    image = np.lib.format.open_memmap(npy_path, mode='w+', dtype=decoded.dtype, shape=decoded.shape)
+    image[:] = decoded
+    image.flush()
+    del image, decoded
+    return npy_path, np.load(npy_path, mmap_mode='r'), True
+
+
+def tile_grid(height, width, tile_size, margin):
+    """(코어 영역, 읽을 영역) 쌍 목록. 영역은 (y0, y1, x0, x1)이며 읽을 영역은 코어를 margin만큼 넓힌 것"""
+    tiles = []
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            core = (y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width))
+            read = (max(0, core[0] - margin), min(height, core[1] + margin),
+                    max(0, core[2] - margin), min(width, core[3] + margin))
+            tiles.append((core, read))
+    return tiles
+
+
+def blend_weights(start, end, core_start, core_end, size, feather):
+    """한 축의 섞기 가중치 (읽은 영역 [start, end), 축 전체 길이 size)
+
+    이웃 타일이 있는 쪽은 코어 경계 ±feather 구간에서 0→1로 선형 증가하고, 이웃 타일의 대칭 가중치와
+    더하면 정확히 1이 됨. 이미지 가장자리 쪽은 1
+    """
+    coords = np.arange(start, end, dtype=np.float32) + 0.5
+    weights = np.ones(end - start, dtype=np.float32)
+    if feather > 0:
+        if core_start > 0:
+            weights *= np.clip((coords - (core_start - feather)) / (2 * feather), 0, 1)
+        if core_end < size:
+            weights *= np.clip(((core_end + feather) - coords) / (2 * feather), 0, 1)
+    else:
+        weights[(coords < core_start) | (coords > core_end)] = 0
+    return weights
+
+
+def denoise_tile(input_path, region, algorithm, params):
+    """입력 메모리 맵에서 한 영역을 읽어 디노이징한 float32 결과를 반환 (워커 프로세스에서 실행)
+
+    TV는 조기 종료 없이(eps=0) tv_iterations번 반복하므로 halo가 반복 횟수 이상이면
+    전체 이미지에 chambolle_tv(image, weight, eps=0, max_num_iter=tv_iterations)를 적용한 결과와 같음
+    """
+    image = np.load(input_path, mmap_mode='r')
+    y0, y1, x0, x1 = region
+    tile = img_as_float(np.array(image[y0:y1, x0:x1]))
+    if algorithm == 'bilateral':
+        result = bilateral_denoise(tile, params['sigma_color'], params['sigma_spatial'])
+    else:
+        result, _, _ = chambolle_tv(tile, params['weight'], eps=0, max_num_iter=params['tv_iterations'])
+    return result.astype(np.float32)
+
+
+def denoise_tiled(input_path, output_path, algorithm='tv', tile_size=1024, workers=None, halo=None,
+                  feather=16, weight=0.1, sigma_color=0.05, sigma_spatial=15, tv_iterations=50):
+    """타일 단위로 디노이징해 float32 .npy 메모리 맵(output_path)에 쓰고 그 배열을 반환
+
+    타일은 코어 경계에서 halo + feather만큼 더 읽으므로 섞이는 픽셀은 모두 읽기 경계에서 halo 이상
+    떨어져 있음. 동시에 처리 중인 타일은 워커 수의 2배 이하로 유지함
+    """
+    output_dir = os.path.dirname(output_path) or '.'
+    os.makedirs(output_dir, exist_ok=True)
+    params = {'weight': weight, 'sigma_color': sigma_color, 'sigma_spatial': sigma_spatial,
+              'tv_iterations': tv_iterations}
+    halo = tile_halo(algorithm, sigma_spatial, tv_iterations) if halo is None else halo
+    feather = min(feather, tile_size // 2)
+    workers = workers or os.cpu_count() or 1
+
+    npy_path, image, temporary = open_input(input_path, output_dir)
+    height, width = image.shape[:2]
+    output = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32, shape=image.shape)
+    tiles = tile_grid(height, width, tile_size, halo + feather)
+    print(f"타일 디노이징: {width}x{height}, {algorithm}, 타일 {tile_size}px, halo {halo}px, "
+          f"feather {feather}px, 타일 {len(tiles)}개, 워커 {workers}개")
+
+    def accumulate(core, region, result):
+        y0, y1, x0, x1 = region
+        wy = blend_weights(y0, y1, core[0], core[1], height, feather)
+        wx = blend_weights(x0, x1, core[2], core[3], width, feather)
+        weights = wy[:, None] * wx[None, :]
+        if result.ndim == 3:
+            weights = weights[..., None]
+        output[y0:y1, x0:x1] += result * weights
+
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            done_count = 0
+            for core, region in tiles:
+                if len(pending) >= 2 * workers:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        accumulate(*pending.pop(future), future.result())
+                        done_count += 1
+                pending[executor.submit(denoise_tile, npy_path, region, algorithm, params)] = (core, region)
+            for future in list(pending):
+                accumulate(*pending.pop(future), future.result())
+                done_count += 1
+        output.flush()
+    finally:
+        del image
+        if temporary:
+            os.remove(npy_path)
+
+    elapsed = time.perf_counter() - start
+    print(f"완료: 타일 {done_count}개, {elapsed:.2f}s ({height * width / elapsed / 1e6:.3f} MP/s)")
+    print(f"결과 저장: {output_path}")
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대용량 이미지 타일 기반 디노이징')
+    parser.add_argument('--input', '-i', required=True,
+                       help='입력 이미지 경로 (.npy만 out-of-core, 그 외 형식은 한 번 전체 디코딩)')
+    parser.add_argument('--output', '-o', default='results/',
+                       help='결과 저장 경로')
+    parser.add_argument('--algorithm', '-a', choices=['tv', 'bilateral'], default='tv',
+                       help='디노이징 알고리즘 (기본값: tv)')
+    parser.add_argument('--tile-size', type=int, default=1024,
+                       help='타일 한 변 크기 (기본값: 1024)')
+    parser.add_argument('--halo', type=int, default=None,
+                       help='타일 halo 폭 (기본값: 알고리즘별 자동 - bilateral 창 반지름, TV 반복 횟수)')
+    parser.add_argument('--tv-iterations', type=int, default=50,
+                       help='TV 반복 횟수 (조기 종료 없음, 기본값: 50)')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                       help='워커 프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--png', action='store_true',
+                       help='결과를 PNG로도 저장 (전체 이미지를 메모리에 올림)')
+
+    args = parser.parse_args()
+
+    name = os.path.splitext(os.path.basename(args.input))[0]
+    output_path = os.path.join(args.output, f'{name}_{args.algorithm}.npy')
+    output = denoise_tiled(args.input, output_path, args.algorithm, args.tile_size, args.workers,
+                           args.halo, tv_iterations=args.tv_iterations)
+    if args.png:
+        png_path = os.path.join(args.output, f'{name}_{args.algorithm}.png')
+        io.imsave(png_path, (np.clip(output, 0, 1) * 255 + 0.5).astype(np.uint8), check_contrast=False)
+        print(f"PNG 저장: {png_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,14 @@ import numpy as np
 import matplotlib.pyplot as plt
 import argparse
 import os
+import sys
 from skimage import io, metrics
 from skimage.restoration import denoise_tv_chambolle
 from skimage.util import random_noise, img_as_float
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'image-denoising'))
+from tv_solver import chambolle_tv
+
 
 def gradient_descent_example(save_path=None):
     """경사하강법을 이용한 선형회귀 최적화"""
@@ -196,32 +200,18 @@ def energy_convergence_analysis(save_path=None):
     # 노이즈 추가
     noisy = random_noise(original, mode='gaussian', var=0.1)
     
-    # 반복적 디노이징으로 에너지 변화 관찰
-    def compute_tv_energy(image, lambda_val=0.1):
-        """Total Variation 에너지 계산"""
-        grad_x = np.gradient(image, axis=0)
-        grad_y = np.gradient(image, axis=1)
-        tv_term = np.sum(np.sqrt(grad_x**2 + grad_y**2))
-        data_term = np.sum((image - original)**2)
-        return data_term + lambda_val * tv_term
-    
+    # Chambolle 솔버 한 번 실행하며 반복마다 에너지 기록 (E = (||u - f||² + λ·TV(u)) / N)
     energies = []
-    current_image = noisy.copy()
-    
-    for i in range(20):
-        energy = compute_tv_energy(current_image)
-        energies.append(energy)
-        
-        if i < 19:  # 마지막 반복이 아니면 디노이징 적용
-            current_image = denoise_tv_chambolle(current_image, weight=0.1)
+    chambolle_tv(noisy, weight=0.1, eps=1e-5, callback=lambda i, u, energy, psnr: energies.append(energy))
     
-    print(f"초기 에너지: {energies[0]:.2f}")
-    print(f"최종 에너지: {energies[-1]:.2f}")
-    print(f"에너지 감소: {energies[0] - energies[-1]:.2f}")
+    print(f"반복 횟수: {len(energies)}")
+    print(f"초기 에너지: {energies[0]:.4f}")
+    print(f"최종 에너지: {energies[-1]:.4f}")
+    print(f"에너지 감소: {energies[0] - energies[-1]:.4f}")
     
     # 에너지 수렴 시각화
     plt.figure(figsize=(10, 6))
-    plt.plot(range(20), energies, 'o-', linewidth=2, markersize=6)
+    plt.plot(range(len(energies)), energies, 'o-', linewidth=2, markersize=4)
     plt.xlabel('Iterations')
     plt.ylabel('Total Variation Energy')
     plt.title('Energy Function Convergence')